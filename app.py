@@ -1,12 +1,25 @@
 import streamlit as st
-import pandas as pd
-import re
-import emoji
 import io
-import unicodedata
+import os
+import shutil
+import tempfile
+from concurrent.futures import CancelledError
 from datetime import datetime
-import plotly.graph_objects as go
-import plotly.express as px
+from functools import partial
+from pathlib import Path
+
+from comment_cleaner import PARALLEL_MIN_ROWS, STREAM_CHUNK_ROWS, CommentCleaner
+from comment_cleaner.batch import MAX_CONCURRENT_FILES, Cancelled
+from comment_cleaner.blocklist import Blocklist
+from comment_cleaner.cache import ResultCache
+from comment_cleaner.dedup import Deduplicator
+from comment_cleaner.jobs import CANCELLED, JobRunner
+from comment_cleaner.export import (
+    EXCEL_MIME, SPLIT_PART_ROWS, iter_csv_parts, iter_parts, to_csv_bytes, to_excel_bytes, to_parquet_bytes,
+    write_split_zip
+)
+from comment_cleaner.readers import SUPPORTED_EXTENSIONS, get_extension, read_sample
+from comment_cleaner.timing import StageTimer, stage
 
 # Page configuration
 st.set_page_config(
@@ -23,6 +36,156 @@ if 'processing_complete' not in st.session_state:
     st.session_state.processing_complete = False
 if 'file_platforms' not in st.session_state:
     st.session_state.file_platforms = {}
+if 'job_ids' not in st.session_state:
+    st.session_state.job_ids = []
+if 'job_messages' not in st.session_state:
+    st.session_state.job_messages = []
+
+@st.cache_resource
+def get_result_cache():
+    # Shared across reruns and browser sessions; set COMMENT_CLEANER_CACHE_DIR for the on-disk tier.
+    return ResultCache(cache_dir=os.environ.get('COMMENT_CLEANER_CACHE_DIR'))
+
+result_cache = get_result_cache()
+
+@st.cache_resource
+def get_job_runner():
+    # One queue for every browser session, so batches outlive the script run that started them.
+    return JobRunner()
+
+job_runner = get_job_runner()
+
+@st.cache_resource(max_entries=4)
+def load_blocklist(contents, action):
+    # Compiling tens of thousands of phrases is slow, so each list and action is built once.
+    return Blocklist.from_files([io.BytesIO(data) for data in contents], action)
+
+@st.cache_data(max_entries=64)
+def load_sample(file_id, _uploaded_file, file_extension):
+    # Every rerun would otherwise re-read each upload; file_id changes when a file is re-uploaded.
+    try:
+        return read_sample(_uploaded_file, file_extension)
+    except Exception:
+        return None
+
+# Incremental mode keeps every cleaned row here, keyed by id or comment text.
+ROW_STORE_PATH = os.environ.get('COMMENT_CLEANER_ROW_STORE',
+                                os.path.join(tempfile.gettempdir(), 'comment_cleaner_rows.sqlite'))
+
+def lazy_export(result, export_format, build):
+    # Download buttons get a callable, so files are only built when clicked,
+    # and only once per result and format. build returns bytes or a Path.
+    def get_data():
+        exports = result.setdefault('exports', {})
+        if export_format not in exports:
+            name = export_format[0] if isinstance(export_format, tuple) else export_format
+            with stage(result.get('timer'), f"export_{name}", result['stats']['final_count']):
+                exports[export_format] = build(result)
+        data = exports[export_format]
+        return data.read_bytes() if isinstance(data, Path) else data
+    return get_data
+
+def build_split_zip(result, base_name, part_rows, formats):
+    # Parts stream into a temp file, so the archive is never built in memory;
+    # discard_result deletes it.
+    if result.get('output_path'):
+        parts = iter_csv_parts(result['output_path'], part_rows)
+    else:
+        parts = iter_parts(result['cleaned_df'], part_rows)
+    fd, zip_path = tempfile.mkstemp(suffix='.zip')
+    with os.fdopen(fd, 'wb') as zip_file:
+        write_split_zip(parts, zip_file, base_name, formats)
+    return Path(zip_path)
+
+def discard_result(result):
+    # Streamed output and exports built into temp files are deleted along with their result.
+    if result.get('output_path'):
+        Path(result['output_path']).unlink(missing_ok=True)
+    for data in result.get('exports', {}).values():
+        if isinstance(data, Path):
+            data.unlink(missing_ok=True)
+
+def clear_results():
+    # A new batch replaces the shown results instead of adding to them.
+    for result in st.session_state.cleaned_results:
+        discard_result(result)
+    st.session_state.cleaned_results = []
+    st.session_state.processing_complete = False
+
+def collect_job(job):
+    # Hand a finished job's results to this session, reporting failures the way inline processing did.
+    outcomes = job.outcomes or [(None, None, None)] * len(job.files)
+    collected = 0
+    for (name, _, _, kwargs), (result, error, exception) in zip(job.files, outcomes):
+        stream_to = kwargs['stream_to']
+        if stream_to and result is not None and result['output_path'] not in (None, stream_to):
+            # A cache hit points at another result's file; take a copy, so each result owns the file it deletes.
+            shutil.copyfile(result['output_path'], stream_to)
+            result = dict(result, output_path=stream_to)
+        elif stream_to and (result is None or result['output_path'] != stream_to):
+            os.remove(stream_to)
+        
+        if isinstance(exception, (Cancelled, CancelledError)):
+            continue
+        
+        if exception is not None:
+            st.session_state.job_messages.append(('error', f"❌ Error: {name} - {str(exception)}"))
+            continue
+        
+        if error:
+            st.session_state.job_messages.append(('error', f"❌ {name}: {error}"))
+            continue
+        
+        if result is None:
+            continue
+        
+        if result['timer'] is not None:
+            result['timer'].log(file=name)
+        st.session_state.cleaned_results.append(dict(result, filename=name, platform=job.info['platforms'][name]))
+        collected += 1
+    
+    if job.state == CANCELLED:
+        st.session_state.job_messages.append(('warning', f"⏹️ Job {job.id} cancelled"))
+    if job.error:
+        st.session_state.job_messages.append(('error', f"❌ Job {job.id} failed: {job.error}"))
+    if collected:
+        st.session_state.job_messages.append(('success', "✅ Processing complete! Switch to Results tab →"))
+        st.session_state.processing_complete = True
+
+def show_jobs():
+    # Runs as a fragment that reruns on its own while jobs are pending, so polling never blocks the page.
+    finished = False
+    for job_id in list(st.session_state.job_ids):
+        job = job_runner.get(job_id)
+        if job is None or job.finished:
+            st.session_state.job_ids.remove(job_id)
+            if job is not None:
+                collect_job(job_runner.pop(job_id))
+                finished = True
+            continue
+        
+        fraction, finished_files, file_fractions = job.progress()
+        position = job_runner.queue_position(job_id)
+        with st.container(border=True):
+            col1, col2 = st.columns([4, 1])
+            with col1:
+                if position is not None:
+                    st.info(f"⏳ Job {job.id}: queued, {position} job(s) ahead")
+                else:
+                    st.progress(fraction, text=f"Job {job.id}: {finished_files}/{len(job.files)} files done")
+                for name, file_fraction in zip(job.names, file_fractions):
+                    st.caption(f"{name}: {file_fraction:.0%}")
+            with col2:
+                if st.button("⏹️ Cancel", key=f"cancel_{job.id}", disabled=job.cancelled.is_set(),
+                             use_container_width=True):
+                    job.cancel()
+    
+    for kind, message in st.session_state.job_messages:
+        getattr(st, kind)(message)
+    
+    if finished:
+        # Refresh the whole page so the Results tab picks up the new results.
+        st.rerun()
 
 # FIXED CSS - Proper Sidebar Display
 st.markdown("""
@@ -293,240 +456,6 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
-class CommentCleaner:
-    """Multilingual social media comment cleaning engine"""
-    
-    def __init__(self, min_char_length=10):
-        self.min_char_length = min_char_length
-        self.cleaning_stats = {}
-        self.removed_rows = {
-            'blank_empty': 0,
-            'too_short': 0,
-            'only_special_chars': 0,
-            'only_emojis': 0
-        }
-    
-    def detect_script_type(self, text):
-        if pd.isna(text) or not text:
-            return 'unknown'
-        
-        text = str(text)
-        script_counts = {
-            'cjk': 0, 'thai': 0, 'devanagari': 0,
-            'arabic': 0, 'cyrillic': 0, 'latin': 0, 'other': 0
-        }
-        
-        for char in text:
-            if '\u4e00' <= char <= '\u9fff' or '\u3040' <= char <= '\u30ff' or '\uac00' <= char <= '\ud7af':
-                script_counts['cjk'] += 1
-            elif '\u0e00' <= char <= '\u0e7f':
-                script_counts['thai'] += 1
-            elif '\u0900' <= char <= '\u097f':
-                script_counts['devanagari'] += 1
-            elif '\u0600' <= char <= '\u06ff':
-                script_counts['arabic'] += 1
-            elif '\u0400' <= char <= '\u04ff':
-                script_counts['cyrillic'] += 1
-            elif char.isalpha() and ord(char) < 128:
-                script_counts['latin'] += 1
-        
-        return max(script_counts, key=script_counts.get)
-    
-    def has_meaningful_content(self, text):
-        if pd.isna(text) or not text:
-            return False
-        
-        text = str(text).strip()
-        text_no_emoji = emoji.replace_emoji(text, replace='')
-        text_clean = text_no_emoji.strip()
-        
-        if not text_clean:
-            return False
-        
-        letter_count = sum(1 for char in text_clean if unicodedata.category(char).startswith('L'))
-        
-        if letter_count >= 2:
-            return True
-        
-        if all(unicodedata.category(char) in ['Po', 'Ps', 'Pe', 'Pd', 'Pc', 'Sk', 'Sm', 'Zs'] 
-               for char in text_clean if char.strip()):
-            return False
-        
-        return letter_count > 0
-    
-    def get_adaptive_min_length(self, text):
-        script = self.detect_script_type(text)
-        
-        if script == 'cjk':
-            return max(3, self.min_char_length // 3)
-        elif script == 'thai':
-            return max(5, self.min_char_length // 2)
-        elif script in ['devanagari', 'arabic']:
-            return max(5, int(self.min_char_length * 0.6))
-        else:
-            return self.min_char_length
-        
-    def remove_emojis(self, text):
-        if pd.isna(text):
-            return text
-        return emoji.replace_emoji(str(text), replace='')
-    
-    def remove_urls(self, text):
-        if pd.isna(text):
-            return text
-        text = str(text)
-        text = re.sub(r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+', '', text)
-        text = re.sub(r'www\.[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}', '', text)
-        return text
-    
-    def remove_mentions(self, text):
-        if pd.isna(text):
-            return text
-        return re.sub(r'@[\w\u4e00-\u9fff\u3040-\u30ff\uac00-\ud7af\u0e00-\u0e7f\u0900-\u097f]+', '', str(text))
-    
-    def remove_hashtags(self, text):
-        if pd.isna(text):
-            return text
-        return re.sub(r'#[\w\u4e00-\u9fff\u3040-\u30ff\uac00-\ud7af\u0e00-\u0e7f\u0900-\u097f]+', '', str(text))
-    
-    def clean_whitespace(self, text):
-        if pd.isna(text):
-            return text
-        text = str(text)
-        text = re.sub(r'\s+', ' ', text)
-        return text.strip()
-    
-    def remove_special_chars(self, text):
-        if pd.isna(text):
-            return text
-        text = str(text)
-        return re.sub(r'([!?.]){3,}', r'\1', text)
-    
-    def is_blank_or_empty(self, text):
-        return pd.isna(text) or text == '' or str(text).strip() == ''
-    
-    def is_only_emojis(self, text):
-        if pd.isna(text):
-            return False
-        no_emoji = emoji.replace_emoji(str(text), replace='')
-        return no_emoji.strip() == ''
-    
-    def calculate_word_count(self, text):
-        if pd.isna(text) or not text:
-            return 0
-        
-        text = str(text).strip()
-        script = self.detect_script_type(text)
-        
-        if script == 'cjk':
-            return sum(1 for char in text if '\u4e00' <= char <= '\u9fff' or 
-                      '\u3040' <= char <= '\u30ff' or '\uac00' <= char <= '\ud7af')
-        elif script == 'thai':
-            thai_chars = sum(1 for char in text if '\u0e00' <= char <= '\u0e7f')
-            return max(1, thai_chars // 4)
-        else:
-            words = text.split()
-            return len([w for w in words if len(w) > 0])
-    
-    def is_valid_comment(self, text, min_length):
-        if pd.isna(text) or text == '':
-            self.removed_rows['blank_empty'] += 1
-            return False
-        
-        cleaned = str(text).strip()
-        
-        if cleaned == '':
-            self.removed_rows['blank_empty'] += 1
-            return False
-        
-        if not self.has_meaningful_content(cleaned):
-            self.removed_rows['only_special_chars'] += 1
-            return False
-        
-        adaptive_min = self.get_adaptive_min_length(cleaned)
-        
-        if len(cleaned) < adaptive_min:
-            self.removed_rows['too_short'] += 1
-            return False
-            
-        return True
-    
-    def detect_comment_column(self, df):
-        columns_lower = [col.lower() for col in df.columns]
-        
-        comment_keywords = ['text', 'comment', 'content', 'message', 'caption',
-                           '评论', '內容', 'コメント', 'ความคิดเห็น', 'टिप्पणी']
-        
-        for keyword in comment_keywords:
-            if keyword in columns_lower:
-                idx = columns_lower.index(keyword)
-                return df.columns[idx]
-        
-        return None
-    
-    def clean_dataset(self, df, comment_column=None, remove_emoji=True, remove_url=True,
-                     remove_mention=False, remove_hashtag=False, min_length=None):
-        
-        if comment_column is None:
-            comment_column = self.detect_comment_column(df)
-            if comment_column is None:
-                return None, "Could not detect comment column. Available columns: " + ", ".join(df.columns)
-        
-        if comment_column not in df.columns:
-            return None, f"Column '{comment_column}' not found in dataset"
-        
-        if min_length is None:
-            min_length = self.min_char_length
-        
-        original_count = len(df)
-        original_comment_col = comment_column
-        
-        self.removed_rows = {
-            'blank_empty': 0, 'too_short': 0,
-            'only_special_chars': 0, 'only_emojis': 0
-        }
-        
-        df = df[~df[comment_column].apply(self.is_blank_or_empty)].copy()
-        
-        if remove_emoji:
-            emoji_only_mask = df[comment_column].apply(self.is_only_emojis)
-            self.removed_rows['only_emojis'] = emoji_only_mask.sum()
-            df = df[~emoji_only_mask].copy()
-        
-        df['cleaned_comment'] = df[comment_column].copy()
-        
-        if remove_url:
-            df['cleaned_comment'] = df['cleaned_comment'].apply(self.remove_urls)
-        if remove_mention:
-            df['cleaned_comment'] = df['cleaned_comment'].apply(self.remove_mentions)
-        if remove_hashtag:
-            df['cleaned_comment'] = df['cleaned_comment'].apply(self.remove_hashtags)
-        
-        df['cleaned_comment'] = df['cleaned_comment'].apply(self.remove_special_chars)
-        df['cleaned_comment'] = df['cleaned_comment'].apply(self.clean_whitespace)
-        
-        df['char_count'] = df['cleaned_comment'].apply(lambda x: len(str(x)) if pd.notna(x) else 0)
-        df['word_count'] = df['cleaned_comment'].apply(self.calculate_word_count)
-        
-        df['is_valid'] = df['cleaned_comment'].apply(lambda x: self.is_valid_comment(x, min_length))
-        df_cleaned = df[df['is_valid']].copy()
-        df_cleaned = df_cleaned.drop('is_valid', axis=1)
-        
-        final_count = len(df_cleaned)
-        self.cleaning_stats = {
-            'original_count': original_count,
-            'final_count': final_count,
-            'total_removed': original_count - final_count,
-            'retention_rate': round((final_count / original_count) * 100, 2) if original_count > 0 else 0
-        }
-        
-        self.preview_data = df_cleaned[['cleaned_comment']].copy()
-        
-        df_cleaned[original_comment_col] = df_cleaned['cleaned_comment']
-        df_cleaned = df_cleaned.drop(['cleaned_comment', 'char_count', 'word_count'], axis=1)
-        
-        return df_cleaned, None
-
 # Header
 st.markdown("""
     <div class="app-header">
@@ -558,10 +487,87 @@ with st.sidebar:
     remove_url = st.checkbox("Remove URLs", value=True)
     remove_mention = st.checkbox("Remove @mentions", value=False)
     remove_hashtag = st.checkbox("Remove #hashtags", value=False)
+    remove_duplicates = st.checkbox("Remove duplicate comments", value=False)
+    near_duplicate_threshold = None
+    dedup_across_files = False
+    if remove_duplicates:
+        if st.checkbox("Include near-duplicates", value=False):
+            near_duplicate_threshold = st.slider(
+                "Near-duplicate similarity",
+                min_value=0.5,
+                max_value=0.95,
+                value=0.8,
+                step=0.05,
+                help="Estimated Jaccard similarity of character 5-grams"
+            )
+        dedup_across_files = st.checkbox("Across all files", value=False,
+                                         help="Keep only the first occurrence in upload order")
+    blocklist_files = st.file_uploader(
+        "Blocklist phrase files",
+        type=["txt"],
+        accept_multiple_files=True,
+        help="One phrase per line; matching ignores case, full-width forms and accents"
+    )
+    blocklist = None
+    if blocklist_files:
+        blocklist_action = st.radio("Blocklisted comments", ["Drop", "Mask"], horizontal=True)
+        blocklist = load_blocklist(tuple(phrase_file.getvalue() for phrase_file in blocklist_files),
+                                   blocklist_action.lower())
+        st.caption(f"{len(blocklist):,} phrases")
+    
+    st.markdown("### ⚡ Performance")
+    workers = st.number_input(
+        "Worker Processes",
+        min_value=1,
+        max_value=os.cpu_count() or 1,
+        value=os.cpu_count() or 1,
+        help=f"Files with {PARALLEL_MIN_ROWS:,}+ rows are cleaned in parallel"
+    )
+    file_workers = st.number_input(
+        "Files in Parallel",
+        min_value=1,
+        max_value=16,
+        value=MAX_CONCURRENT_FILES,
+        help="Uploaded files cleaned at the same time"
+    )
+    dedupe = st.checkbox(
+        "Clean repeated comments once",
+        value=True,
+        help="Each distinct comment is cleaned once and the result reused for its duplicates"
+    )
+    stream_csv = st.checkbox(
+        "Stream CSVs to disk",
+        value=False,
+        help=f"Cleans CSVs {STREAM_CHUNK_ROWS:,} rows at a time for files larger than memory"
+    )
+    incremental = st.checkbox(
+        "Only clean new rows",
+        value=False,
+        help="Remembers cleaned rows between runs; changing any option starts over"
+    )
+    if incremental:
+        key_column = st.text_input(
+            "Row ID column",
+            value="",
+            help="Column that identifies a comment across exports; leave blank to match on the comment text"
+        ).strip() or None
+    record_timings = st.checkbox(
+        "Record stage timings",
+        value=False,
+        help="Wall time and rows/sec per stage, shown under View Details"
+    )
     
     st.markdown("---")
     st.markdown("### 📦 Export")
+    add_metrics = st.checkbox(
+        "Add text metrics columns",
+        value=False,
+        help="Character, word, emoji, URL, mention and hashtag counts and the script of each comment"
+    )
     split_files = st.checkbox("Split large files (10k+ rows)", value=True)
+    if split_files:
+        part_rows = st.number_input("Rows per part", min_value=1000, value=SPLIT_PART_ROWS, step=1000)
+        part_formats = st.multiselect("Part formats", ["CSV", "Excel"], default=["CSV"])
 
 # Main tabs
 tab1, tab2 = st.tabs(["📤 Upload & Process", "📊 Results"])
@@ -569,8 +575,8 @@ tab1, tab2 = st.tabs(["📤 Upload & Process", "📊 Results"])
 with tab1:
     st.markdown("### Upload Files")
     uploaded_files = st.file_uploader(
-        "Choose CSV or Excel files",
-        type=['csv', 'xlsx', 'xls'],
+        "Choose CSV, Excel, Parquet or Feather files",
+        type=SUPPORTED_EXTENSIONS,
         accept_multiple_files=True,
         help="Drag and drop or click to browse"
     )
@@ -578,6 +584,10 @@ with tab1:
     if uploaded_files:
         st.success(f"✓ {len(uploaded_files)} file(s) uploaded")
         
+        # Header and first rows only; the full files are read when processing starts.
+        samples = {uploaded_file.name: load_sample(uploaded_file.file_id, uploaded_file, get_extension(uploaded_file.name))
+                   for uploaded_file in uploaded_files}
+        
         st.markdown("### Label Platforms")
         
         cols = st.columns(min(len(uploaded_files), 3))
@@ -585,6 +595,11 @@ with tab1:
         for idx, uploaded_file in enumerate(uploaded_files):
             with cols[idx % 3]:
                 st.caption(f"**{uploaded_file.name}**")
+                sample = samples[uploaded_file.name]
+                if sample is not None:
+                    comment_column = CommentCleaner().detect_comment_column(sample)
+                    st.caption(f"Comment column: {comment_column}" if comment_column is not None
+                               else "⚠️ No comment column found")
                 platform = st.selectbox(
                     "Platform",
                     ["Instagram", "YouTube", "TikTok", "Reddit", "Facebook", "Twitter", "LinkedIn", "Other"],
@@ -593,71 +608,60 @@ with tab1:
                 )
                 st.session_state.file_platforms[uploaded_file.name] = platform
         
+        all_columns = list(dict.fromkeys(
+            column for sample in samples.values() if sample is not None for column in sample.columns
+        ))
+        with st.expander("🧩 Columns to Keep"):
+            selected_columns = st.multiselect(
+                "Columns",
+                all_columns,
+                default=all_columns,
+                help="The comment column is always kept; columns left out are never loaded"
+            )
+        keep_columns = None if len(selected_columns) == len(all_columns) else selected_columns
+        
         st.markdown("---")
         
         if st.button("🚀 Start Processing", type="primary", use_container_width=True):
-            st.session_state.cleaned_results = []
-            st.session_state.processing_complete = False
-            
-            progress_bar = st.progress(0)
-            status_text = st.empty()
+            options = dict(
+                remove_emoji=remove_emoji, remove_url=remove_url,
+                remove_mention=remove_mention, remove_hashtag=remove_hashtag,
+                min_length=min_length, dedupe=dedupe,
+                remove_duplicates=remove_duplicates, near_duplicate_threshold=near_duplicate_threshold,
+                blocklist=blocklist, metrics=add_metrics
+            )
+            if dedup_across_files:
+                # One shared index; files run one at a time so "first" means upload order.
+                options['deduplicator'] = Deduplicator(near_duplicate_threshold)
+                file_workers = 1
+            # Split the worker processes between files cleaned at the same time.
+            options['workers'] = max(1, workers // min(file_workers, len(uploaded_files)))
             
-            for idx, uploaded_file in enumerate(uploaded_files):
-                try:
-                    progress = (idx + 1) / len(uploaded_files)
-                    progress_bar.progress(progress)
-                    status_text.info(f"Processing: {uploaded_file.name} ({idx+1}/{len(uploaded_files)})")
-                    
-                    file_extension = uploaded_file.name.lower().split('.')[-1]
-                    
-                    if file_extension == 'csv':
-                        try:
-                            df = pd.read_csv(uploaded_file, encoding='utf-8')
-                        except:
-                            uploaded_file.seek(0)
-                            try:
-                                df = pd.read_csv(uploaded_file, encoding='utf-8-sig')
-                            except:
-                                uploaded_file.seek(0)
-                                df = pd.read_csv(uploaded_file, encoding='latin-1')
-                    elif file_extension in ['xlsx', 'xls']:
-                        df = pd.read_excel(uploaded_file, engine='openpyxl' if file_extension == 'xlsx' else None)
-                    else:
-                        continue
-                    
-                    cleaner = CommentCleaner(min_char_length=min_length)
-                    detected_col = cleaner.detect_comment_column(df)
-                    
-                    if not detected_col:
-                        st.error(f"❌ {uploaded_file.name}: Could not detect comment column")
-                        continue
-                    
-                    cleaned_df, error = cleaner.clean_dataset(
-                        df, comment_column=detected_col,
-                        remove_emoji=remove_emoji, remove_url=remove_url,
-                        remove_mention=remove_mention, remove_hashtag=remove_hashtag,
-                        min_length=min_length
-                    )
-                    
-                    if error:
-                        st.error(f"❌ {uploaded_file.name}: {error}")
-                        continue
-                    
-                    st.session_state.cleaned_results.append({
-                        'filename': uploaded_file.name,
-                        'platform': st.session_state.file_platforms[uploaded_file.name],
-                        'cleaned_df': cleaned_df,
-                        'stats': cleaner.cleaning_stats.copy(),
-                        'removed': cleaner.removed_rows.copy(),
-                        'preview': cleaner.preview_data.copy()
-                    })
-                    
-                except Exception as e:
-                    st.error(f"❌ Error: {uploaded_file.name} - {str(e)}")
+            files = []
+            for uploaded_file in uploaded_files:
+                file_extension = get_extension(uploaded_file.name)
+                if file_extension not in SUPPORTED_EXTENSIONS:
+                    continue
+                
+                stream_to = None
+                if file_extension == 'csv' and stream_csv:
+                    fd, stream_to = tempfile.mkstemp(suffix='.csv')
+                    os.close(fd)
+                
+                # The job reads its own copy; later reruns keep sampling the uploaded file.
+                files.append((uploaded_file.name, io.BytesIO(uploaded_file.getvalue()), file_extension, dict(
+                    stream_to=stream_to, cache=result_cache, keep_columns=keep_columns,
+                    timer=StageTimer() if record_timings else None,
+                    row_store=ROW_STORE_PATH if incremental else None,
+                    key_column=key_column if incremental else None
+                )))
             
-            progress_bar.progress(1.0)
-            status_text.success("✅ Processing complete! Switch to Results tab →")
-            st.session_state.processing_complete = True
+            platforms = {name: st.session_state.file_platforms[name] for name, _, _, _ in files}
+            clear_results()
+            st.session_state.job_ids.append(
+                job_runner.submit(files, options, max_files=file_workers, platforms=platforms)
+            )
+            st.session_state.job_messages = []
     
     else:
         st.info("👆 Upload files to get started")
@@ -672,6 +676,9 @@ with tab1:
         with col3:
             st.markdown("**🔒 Privacy First**")
             st.caption("All processing happens locally")
+    
+    # Poll only while this session has jobs in flight.
+    st.fragment(show_jobs, run_every=1.0 if st.session_state.job_ids else None)()
 
 with tab2:
     if st.session_state.processing_complete and st.session_state.cleaned_results:
@@ -734,51 +741,102 @@ with tab2:
                         st.markdown("**Removal Breakdown**")
                         for key, value in result['removed'].items():
                             st.caption(f"• {key.replace('_', ' ').title()}: {value:,}")
+                        
+                        st.markdown("**Script Breakdown**")
+                        for script, value in result['stats'].get('script_breakdown', {}).items():
+                            st.caption(f"• {script.title()}: {value:,}")
+                        
+                        if result.get('encoding'):
+                            st.markdown("**Source Encoding**")
+                            st.caption(f"• {result['encoding']}")
                     
                     with detail_col2:
                         st.markdown("**Sample Preview**")
                         st.dataframe(result['preview'].head(5), use_container_width=True, height=200)
+                    
+                    if result.get('timer') is not None:
+                        st.markdown("**Stage Timings**")
+                        st.dataframe(result['timer'].records(), use_container_width=True, hide_index=True)
+                        st.download_button(
+                            label="⏱️ Download timings (JSON)",
+                            data=partial(result['timer'].to_json, file=result['filename']),
+                            file_name=f"{result['filename'].rsplit('.', 1)[0]}_timings.json",
+                            mime="application/json",
+                            on_click="ignore",
+                            key=f"timings_{idx}"
+                        )
                 
                 with st.expander("💾 Download Options"):
-                    cleaned_df = result['cleaned_df']
                     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
                     base_name = result['filename'].rsplit('.', 1)[0]
                     platform_prefix = result['platform'].lower().replace(' ', '_')
                     
-                    col1, col2 = st.columns(2)
-                    
-                    with col1:
-                        output = io.BytesIO()
-                        with pd.ExcelWriter(output, engine='openpyxl') as writer:
-                            cleaned_df.to_excel(writer, index=False)
-                        excel_data = output.getvalue()
-                        
-                        st.download_button(
-                            label="📥 Download Excel",
-                            data=excel_data,
-                            file_name=f"{platform_prefix}_{base_name}_{timestamp}.xlsx",
-                            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                            use_container_width=True,
-                            key=f"excel_{idx}"
-                        )
-                    
-                    with col2:
-                        csv_data = ('\ufeff' + cleaned_df.to_csv(index=False)).encode('utf-8')
-                        
+                    if result.get('output_path'):
                         st.download_button(
                             label="📥 Download CSV",
-                            data=csv_data,
+                            data=partial(Path(result['output_path']).read_bytes),
                             file_name=f"{platform_prefix}_{base_name}_{timestamp}.csv",
                             mime="text/csv",
+                            on_click="ignore",
                             use_container_width=True,
                             key=f"csv_{idx}"
                         )
-                
+                    else:
+                        col1, col2, col3 = st.columns(3)
+                        
+                        with col1:
+                            st.download_button(
+                                label="📥 Download Excel",
+                                data=lazy_export(result, 'xlsx', lambda result: to_excel_bytes(result['cleaned_df'])),
+                                file_name=f"{platform_prefix}_{base_name}_{timestamp}.xlsx",
+                                mime=EXCEL_MIME,
+                                on_click="ignore",
+                                use_container_width=True,
+                                key=f"excel_{idx}"
+                            )
+                        
+                        with col2:
+                            st.download_button(
+                                label="📥 Download CSV",
+                                data=lazy_export(result, 'csv', lambda result: to_csv_bytes(result['cleaned_df'])),
+                                file_name=f"{platform_prefix}_{base_name}_{timestamp}.csv",
+                                mime="text/csv",
+                                on_click="ignore",
+                                use_container_width=True,
+                                key=f"csv_{idx}"
+                            )
+                        
+                        with col3:
+                            st.download_button(
+                                label="📥 Download Parquet",
+                                data=lazy_export(result, 'parquet', lambda result: to_parquet_bytes(result['cleaned_df'])),
+                                file_name=f"{platform_prefix}_{base_name}_{timestamp}.parquet",
+                                mime="application/vnd.apache.parquet",
+                                on_click="ignore",
+                                use_container_width=True,
+                                key=f"parquet_{idx}"
+                            )
+                    
+                    if split_files and part_formats and result['stats']['final_count'] > part_rows:
+                        formats = tuple({"CSV": 'csv', "Excel": 'xlsx'}[name] for name in part_formats)
+                        st.download_button(
+                            label=f"📦 Download in {part_rows:,}-row parts (ZIP)",
+                            data=lazy_export(
+                                result, ('zip', part_rows, formats),
+                                partial(build_split_zip, base_name=f"{platform_prefix}_{base_name}",
+                                        part_rows=part_rows, formats=formats)
+                            ),
+                            file_name=f"{platform_prefix}_{base_name}_{timestamp}_parts.zip",
+                            mime="application/zip",
+                            on_click="ignore",
+                            use_container_width=True,
+                            key=f"zip_{idx}"
+                        )
+                    
                 st.markdown("---")
         
         if st.button("🔄 Process New Files", use_container_width=True):
-            st.session_state.cleaned_results = []
-            st.session_state.processing_complete = False
+            clear_results()
             st.rerun()
     
     else:
@@ -0,0 +1,80 @@
+"""Seeded generator of synthetic multilingual social media comments."""
+
+import random
+
+import pandas as pd
+
+WORDS = {
+    'latin': ('love this video so much great content the best part was at the end thanks for '
+              'sharing amazing tutorial really helpful quality keep going subscribed').split(),
+    'cjk': ['我', '喜欢', '这个', '视频', '太好了', '谢谢', 'すごい', 'ありがとう', '動画', '最高', '좋아요', '정말', '감사합니다'],
+    'thai': ['สวัสดี', 'ดีมาก', 'ชอบ', 'มาก', 'ขอบคุณ', 'ครับ', 'ค่ะ', 'สุดยอด'],
+    'devanagari': ['नमस्ते', 'बहुत', 'अच्छा', 'वीडियो', 'धन्यवाद', 'शानदार', 'है'],
+    'arabic': ['مرحبا', 'شكرا', 'جميل', 'جدا', 'فيديو', 'رائع'],
+    'cyrillic': ['привет', 'класс', 'спасибо', 'отличное', 'видео', 'очень', 'круто'],
+}
+EMOJI = ['😀', '😂', '❤️', '🔥', '👍', '🙏', '😍', '🎉', '👏🏽', '👨‍👩‍👧', '🇯🇵', '✨', '💯']
+URLS = ['https://youtu.be/dQw4w9WgXcQ', 'http://example.com/page?id=42', 'www.shop.example.co.uk/sale', 'https://t.co/AbC123']
+MENTIONS = ['@creator', '@José_M', '@用户123', '@ผู้ใช้', '@नाम']
+HASHTAGS = ['#viral', '#fyp', '#旅行', '#ไทย', '#हिंदी', '#2024']
+PUNCTUATION = ['!!!', '???', '...', '!?!?', '.....']
+# Separators between words; CJK and Thai are usually written without spaces.
+JOINERS = {'cjk': '', 'thai': ''}
+
+# Share of each kind of comment in the corpus.
+MIX = [
+    ('latin', 0.40), ('cjk', 0.12), ('thai', 0.06), ('devanagari', 0.06), ('arabic', 0.05),
+    ('cyrillic', 0.06), ('emoji_only', 0.08), ('punctuation_only', 0.03), ('short', 0.07),
+    ('blank', 0.03), ('spam', 0.04),
+]
+
+def text_comment(rng, script):
+    words = [rng.choice(WORDS[script]) for _ in range(rng.randint(2, 20))]
+    text = JOINERS.get(script, ' ').join(words)
+    extras = []
+    if rng.random() < 0.15:
+        extras.append(rng.choice(URLS))
+    if rng.random() < 0.15:
+        extras.append(rng.choice(MENTIONS))
+    if rng.random() < 0.15:
+        extras.append(rng.choice(HASHTAGS))
+    if rng.random() < 0.25:
+        extras.append(''.join(rng.choice(EMOJI) for _ in range(rng.randint(1, 3))))
+    if rng.random() < 0.15:
+        extras.append(rng.choice(PUNCTUATION))
+    parts = [text] + extras
+    rng.shuffle(parts)
+    return ' '.join(parts)
+
+def random_comment(rng):
+    kind = rng.choices([kind for kind, _ in MIX], weights=[weight for _, weight in MIX])[0]
+    if kind in WORDS:
+        return text_comment(rng, kind)
+    if kind == 'emoji_only':
+        return ' '.join(rng.choice(EMOJI) for _ in range(rng.randint(1, 6)))
+    if kind == 'punctuation_only':
+        return ''.join(rng.choice(PUNCTUATION) for _ in range(rng.randint(1, 3)))
+    if kind == 'short':
+        return rng.choice(['first!', 'nice', 'lol', 'wow', '好', 'ดี', 'ok 👍'])
+    if kind == 'blank':
+        return rng.choice(['', '   ', None])
+    return rng.choice(URLS) + ' ' + rng.choice(HASHTAGS) + ' check my channel ' + rng.choice(MENTIONS)
+
+def make_corpus(rows, seed=0, duplicate_rate=0.0):
+    """DataFrame of rows synthetic comments plus id/likes/timestamp columns, reproducible for a seed.
+
+    duplicate_rate is the share of rows that repeat an earlier comment verbatim.
+    """
+    rng = random.Random(seed)
+    comments = []
+    for _ in range(rows):
+        if comments and rng.random() < duplicate_rate:
+            comments.append(rng.choice(comments))
+        else:
+            comments.append(random_comment(rng))
+    return pd.DataFrame({
+        'id': range(rows),
+        'comment': pd.Series(comments, dtype=object),
+        'likes': [rng.randint(0, 5000) for _ in range(rows)],
+        'timestamp': pd.Timestamp('2024-01-01') + pd.to_timedelta([rng.randint(0, 86400 * 365) for _ in range(rows)], unit='s'),
+    })
@@ -0,0 +1,121 @@
+"""Throughput and peak-memory benchmarks for CommentCleaner.
+
+    python -m benchmarks.run --sizes 1000 10000 100000 --output results.json
+
+Each benchmark is timed without tracing, then run once more under
+tracemalloc for its peak Python allocation. Results are one JSON document
+so runs can be diffed or collected over time.
+"""
+
+import argparse
+import itertools
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import pandas as pd
+
+from comment_cleaner import CommentCleaner
+from .corpus import make_corpus
+
+# Per-comment public methods, called once per row.
+METHODS = [
+    'detect_script_type', 'has_meaningful_content', 'calculate_word_count',
+    'remove_emojis', 'remove_urls', 'remove_mentions', 'remove_hashtags',
+    'remove_special_chars', 'clean_whitespace',
+]
+RULES = ['remove_emoji', 'remove_url', 'remove_mention', 'remove_hashtag']
+
+def measure(func, rows, repeat, memory=True):
+    """Best wall time over repeat runs, and peak traced bytes of one more run."""
+    func()  # warm up compiled patterns and caches
+    seconds = min(timed(func) for _ in range(repeat))
+    peak = None
+    if memory:
+        tracemalloc.start()
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return {
+        'rows': rows,
+        'seconds': round(seconds, 6),
+        'rows_per_sec': round(rows / seconds, 1) if seconds else None,
+        'peak_memory_bytes': peak,
+    }
+
+def timed(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+def method_benchmarks(cleaner, texts, repeat, memory):
+    texts = [text for text in texts if isinstance(text, str)]
+    for name in METHODS:
+        method = getattr(cleaner, name)
+        result = measure(lambda: [method(text) for text in texts], len(texts), repeat, memory)
+        yield dict(benchmark='method', name=name, **result)
+
+def dataset_benchmarks(df, min_length, repeat, memory, dedupe):
+    for values in itertools.product([True, False], repeat=len(RULES)):
+        options = dict(zip(RULES, values))
+        
+        def run():
+            CommentCleaner(min_char_length=min_length).clean_dataset(df, comment_column='comment', dedupe=dedupe, **options)
+        
+        name = ','.join(rule for rule, value in options.items() if value) or 'none'
+        yield dict(benchmark='clean_dataset', name=name, options=options, dedupe=dedupe,
+                   **measure(run, len(df), repeat, memory))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='benchmarks.run', description=__doc__.split('\n')[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000],
+                        help='Corpus sizes in rows (default: 1000 10000 100000; up to 5000000)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--duplicate-rate', type=float, default=0.3, help='Share of verbatim repeats in the corpus')
+    parser.add_argument('--repeat', type=int, default=3, help='Timed runs per benchmark; the best is kept')
+    parser.add_argument('--min-length', type=int, default=10)
+    parser.add_argument('--only', choices=['method', 'clean_dataset'], help='Run one group of benchmarks')
+    parser.add_argument('--dedupe', action='store_true', help='Benchmark clean_dataset with dedupe=True')
+    parser.add_argument('--no-memory', action='store_true', help='Skip the tracemalloc runs')
+    parser.add_argument('--output', help='Write JSON here instead of stdout')
+    args = parser.parse_args(argv)
+    
+    report = {
+        'meta': {
+            'started_at': datetime.now(timezone.utc).isoformat(),
+            'python': sys.version.split()[0],
+            'pandas': pd.__version__,
+            'platform': platform.platform(),
+            'seed': args.seed,
+            'duplicate_rate': args.duplicate_rate,
+            'repeat': args.repeat,
+        },
+        'results': [],
+    }
+    
+    for size in args.sizes:
+        df = make_corpus(size, seed=args.seed, duplicate_rate=args.duplicate_rate)
+        cleaner = CommentCleaner(min_char_length=args.min_length)
+        groups = []
+        if args.only in (None, 'method'):
+            groups.append(method_benchmarks(cleaner, df['comment'].tolist(), args.repeat, not args.no_memory))
+        if args.only in (None, 'clean_dataset'):
+            groups.append(dataset_benchmarks(df, args.min_length, args.repeat, not args.no_memory, args.dedupe))
+        for result in itertools.chain(*groups):
+            report['results'].append(result)
+            print(f"{result['benchmark']:>13} {result['name']:<45} {size:>9,} rows "
+                  f"{result['rows_per_sec'] or 0:>14,.0f} rows/s", file=sys.stderr)
+    
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as out:
+            out.write(output + '\n')
+    else:
+        print(output)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,10 @@
+"""Multilingual social media comment cleaner, usable without the Streamlit UI."""
+
+__all__ = ['CommentCleaner', 'PARALLEL_MIN_ROWS', 'STREAM_CHUNK_ROWS']
+
+def __getattr__(name):
+    # The engine pulls in pandas and the emoji tables, so load it on first use.
+    if name in __all__:
+        from . import cleaner
+        return getattr(cleaner, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,78 @@
+"""Clean several files at once on a bounded thread pool."""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from .pipeline import clean_source
+
+# Files cleaned at the same time by default; each holds its frame in memory.
+MAX_CONCURRENT_FILES = 4
+
+class Cancelled(Exception):
+    """Raised inside a file's cleaning once its batch has been cancelled."""
+
+class FileBatch:
+    """Runs clean_source for each submitted file on at most max_files threads.
+
+    Reading and parsing overlap across files. A large file can still spread
+    its cleaning over worker processes via the workers option. Poll
+    progress() while wait() is False, then take outcomes() in submit order.
+    cancel() stops files that haven't started and interrupts running ones
+    at their next progress report.
+    """
+    
+    def __init__(self, max_files=MAX_CONCURRENT_FILES):
+        self.executor = ThreadPoolExecutor(max_workers=max_files)
+        self.futures = []
+        self.fractions = []
+        self.lock = threading.Lock()
+        self.cancelled = threading.Event()
+    
+    def submit(self, source, file_extension, options, **kwargs):
+        index = len(self.futures)
+        self.fractions.append(0.0)
+        
+        def report(fraction):
+            if self.cancelled.is_set():
+                raise Cancelled()
+            with self.lock:
+                self.fractions[index] = fraction
+        
+        self.futures.append(self.executor.submit(
+            clean_source, source, file_extension, options, progress=report, **kwargs
+        ))
+        return index
+    
+    def progress(self):
+        """Overall fraction done and the number of finished files."""
+        fractions = self.file_progress()
+        finished = sum(future.done() for future in self.futures)
+        return sum(fractions) / max(len(fractions), 1), finished
+    
+    def file_progress(self):
+        """Fraction done of each file, in submit order."""
+        with self.lock:
+            fractions = list(self.fractions)
+        return [1.0 if future.done() else fraction for future, fraction in zip(self.futures, fractions)]
+    
+    def cancel(self):
+        self.cancelled.set()
+        for future in self.futures:
+            future.cancel()
+    
+    def wait(self, timeout=None):
+        """True once every file has finished."""
+        _, pending = wait(self.futures, timeout=timeout)
+        return not pending
+    
+    def outcomes(self):
+        """(result, error, exception) per file in submit order; one file's failure doesn't affect the rest."""
+        outcomes = []
+        for future in self.futures:
+            try:
+                result, error = future.result()
+                outcomes.append((result, error, None))
+            except Exception as e:
+                outcomes.append((None, None, e))
+        self.executor.shutdown()
+        return outcomes
@@ -0,0 +1,165 @@
+"""Phrase blocklists matched with an Aho-Corasick automaton, one pass per comment."""
+
+import hashlib
+import unicodedata
+from bisect import bisect_right
+from collections import deque
+from itertools import accumulate
+
+ACTIONS = ['drop', 'mask']
+MASK_CHAR = '*'
+# Edge keys are node * CODE_SPACE + code point, so the whole automaton is one dict.
+CODE_SPACE = 0x110000
+# Scripts from Thai on are written without spaces between words (or, like
+# Korean, attach particles to them), so phrases in them match anywhere.
+UNSPACED_FROM = '\u0e00'
+
+class FoldTable(dict):
+    """str.translate table mapping each character to its NFKD, case-folded form.
+
+    Filled on first sight of a character. Format characters (zero-width
+    spaces and joiners, soft hyphens) fold to nothing, so they can't be
+    used to split a phrase.
+    """
+    
+    def __missing__(self, code):
+        char = chr(code)
+        if unicodedata.category(char) == 'Cf':
+            folded = ''
+        else:
+            folded = unicodedata.normalize('NFKD', unicodedata.normalize('NFKD', char).casefold())
+        self[code] = folded
+        return folded
+
+FOLD_TABLE = FoldTable()
+
+def fold(text):
+    """text in the form phrases and comments are compared in."""
+    return text.translate(FOLD_TABLE)
+
+def is_word_char(char):
+    # Combining marks continue the word they follow (accents after NFKD, Indic vowel signs).
+    return char.isalnum() or char == '_' or unicodedata.category(char)[0] == 'M'
+
+def needs_boundary(char):
+    return is_word_char(char) and char < UNSPACED_FROM
+
+def read_phrases(source):
+    """Phrases from a path or binary file-like, one per line; blank lines and lines starting with # are skipped."""
+    if hasattr(source, 'read'):
+        text = source.read().decode('utf-8-sig')
+    else:
+        with open(source, encoding='utf-8-sig') as phrase_file:
+            text = phrase_file.read()
+    return [line.strip() for line in text.splitlines() if line.strip() and not line.lstrip().startswith('#')]
+
+class Blocklist:
+    """Drops or masks comments containing any of a set of phrases.
+
+    Phrases and comments are compared after fold(), so case, compatibility
+    forms (full-width letters, ligatures) and composed vs decomposed accents
+    don't matter. With whole_words, a phrase that starts or ends with a
+    letter of a space-separated script only matches at a word boundary there,
+    so 'ass' doesn't hit 'class'. All phrases are compiled into one
+    Aho-Corasick automaton, so a comment is scanned once however many
+    phrases there are.
+    """
+    
+    def __init__(self, phrases, action='drop', whole_words=True):
+        if action not in ACTIONS:
+            raise ValueError(f"Unknown blocklist action '{action}'. Actions: " + ", ".join(ACTIONS))
+        self.action = action
+        self.whole_words = whole_words
+        self.phrases = sorted({' '.join(fold(phrase).split()) for phrase in phrases} - {''})
+        self.build()
+    
+    @classmethod
+    def from_files(cls, sources, action='drop', whole_words=True):
+        """A Blocklist of every phrase in the given paths or binary file-likes."""
+        return cls([phrase for source in sources for phrase in read_phrases(source)], action, whole_words)
+    
+    def __len__(self):
+        return len(self.phrases)
+    
+    @property
+    def fingerprint(self):
+        """Hash of the phrases and settings, for cache and row store keys."""
+        return hashlib.blake2b(
+            '\n'.join([self.action, str(self.whole_words)] + self.phrases).encode('utf-8', 'surrogatepass'),
+            digest_size=16
+        ).hexdigest()
+    
+    def build(self):
+        # Trie of every phrase: edges maps node * CODE_SPACE + code point to the
+        # child node, and lengths[node] holds the lengths of phrases ending there.
+        self.edges = {}
+        lengths = [()]
+        for phrase in self.phrases:
+            node = 0
+            for char in phrase:
+                key = node * CODE_SPACE + ord(char)
+                child = self.edges.get(key)
+                if child is None:
+                    child = self.edges[key] = len(lengths)
+                    lengths.append(())
+                node = child
+            lengths[node] = (len(phrase),)
+        
+        # Failure links breadth first: the longest proper suffix that is also in the trie.
+        children = [[] for _ in lengths]
+        for key, child in self.edges.items():
+            children[key // CODE_SPACE].append((key % CODE_SPACE, child))
+        self.fail = [0] * len(lengths)
+        queue = deque(child for _, child in children[0])
+        while queue:
+            node = queue.popleft()
+            for code, child in children[node]:
+                queue.append(child)
+                fallback = self.fail[node]
+                while fallback and fallback * CODE_SPACE + code not in self.edges:
+                    fallback = self.fail[fallback]
+                self.fail[child] = self.edges.get(fallback * CODE_SPACE + code, 0)
+                lengths[child] = lengths[child] + lengths[self.fail[child]]
+        self.lengths = lengths
+    
+    def matches(self, folded):
+        """(start, end) of every phrase in folded text, in order of end."""
+        edges, fail, lengths = self.edges, self.fail, self.lengths
+        node = 0
+        for end, char in enumerate(folded, 1):
+            code = ord(char)
+            child = edges.get(node * CODE_SPACE + code, 0)
+            while not child and node:
+                node = fail[node]
+                child = edges.get(node * CODE_SPACE + code, 0)
+            node = child
+            for length in lengths[node]:
+                start = end - length
+                if self.whole_words and not self.at_boundary(folded, start, end):
+                    continue
+                yield start, end
+    
+    def at_boundary(self, folded, start, end):
+        if start > 0 and needs_boundary(folded[start]) and is_word_char(folded[start - 1]):
+            return False
+        if end < len(folded) and needs_boundary(folded[end - 1]) and is_word_char(folded[end]):
+            return False
+        return True
+    
+    def search(self, text):
+        """True if text contains any phrase."""
+        return next(self.matches(fold(text)), None) is not None
+    
+    def mask(self, text):
+        """text with every character of every matched phrase replaced by MASK_CHAR."""
+        folded = fold(text)
+        spans = list(self.matches(folded))
+        if not spans:
+            return text
+        # Where each original character's folded form ends, to map spans back.
+        ends = list(accumulate(len(FOLD_TABLE[ord(char)]) for char in text))
+        chars = list(text)
+        for start, end in spans:
+            for idx in range(bisect_right(ends, start), bisect_right(ends, end - 1) + 1):
+                chars[idx] = MASK_CHAR
+        return ''.join(chars)
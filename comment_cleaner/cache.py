@@ -0,0 +1,155 @@
+"""Cleaning results keyed on file content plus options, in memory and optionally on disk."""
+
+import hashlib
+import importlib.util
+import json
+import os
+import shutil
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+# The disk tier is Parquet, which pandas writes through pyarrow.
+PARQUET_AVAILABLE = importlib.util.find_spec('pyarrow') is not None
+
+# Options that change the cleaned output; workers and streaming don't.
+KEY_OPTIONS = ['min_length', 'remove_emoji', 'remove_url', 'remove_mention', 'remove_hashtag', 'comment_column',
+               'keep_columns', 'remove_duplicates', 'near_duplicate_threshold', 'blocklist', 'metrics']
+
+def hash_source(source, block_size=1 << 20):
+    """blake2b of a file-like object's bytes, read in blocks; rewinds it afterwards."""
+    digest = hashlib.blake2b(digest_size=20)
+    for block in iter(lambda: source.read(block_size), b''):
+        digest.update(block)
+    source.seek(0)
+    return digest.hexdigest()
+
+def key_settings(options):
+    """The KEY_OPTIONS of options as JSON-ready values; a Blocklist stands in as its fingerprint."""
+    settings = {name: options.get(name) for name in KEY_OPTIONS}
+    if settings['blocklist'] is not None:
+        settings['blocklist'] = settings['blocklist'].fingerprint
+    return settings
+
+def result_bytes(result):
+    """Memory held by a result's DataFrames."""
+    return sum(int(result[name].memory_usage(deep=True).sum())
+               for name in ['cleaned_df', 'preview'] if result.get(name) is not None)
+
+def cache_key(content_hash, file_extension, options):
+    settings = key_settings(options)
+    settings['extension'] = file_extension
+    return content_hash + '-' + hashlib.blake2b(
+        json.dumps(settings, sort_keys=True).encode(), digest_size=8
+    ).hexdigest()
+
+class ResultCache:
+    """Two-tier LRU cache of result dicts (cleaned_df, stats, removed, preview, encoding).
+
+    The memory tier keeps the most recently used results that fit in
+    max_memory_bytes of DataFrame memory. If cache_dir is set and
+    pyarrow is installed, results are also written there as Parquet and the
+    least recently used entries are evicted past max_disk_bytes.
+    """
+    
+    def __init__(self, max_memory_bytes=512 * 1024 ** 2, cache_dir=None, max_disk_bytes=2 * 1024 ** 3):
+        self.max_memory_bytes = max_memory_bytes
+        self.cache_dir = cache_dir if cache_dir and PARQUET_AVAILABLE else None
+        self.max_disk_bytes = max_disk_bytes
+        self.entries = OrderedDict()
+        self.sizes = {}
+        self.memory_bytes = 0
+        # Files of one batch are cleaned on several threads at once.
+        self.lock = threading.Lock()
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+    
+    def get(self, key):
+        with self.lock:
+            result = self.entries.get(key)
+            if result is not None:
+                if result.get('output_path') and not os.path.exists(result['output_path']):
+                    self.forget(key)
+                    return None
+                self.entries.move_to_end(key)
+                return result
+        
+        result = self.read_disk(key)
+        if result is not None:
+            self.remember(key, result)
+        return result
+    
+    def put(self, key, result):
+        result = {name: result.get(name) for name in ['cleaned_df', 'output_path', 'stats', 'removed', 'preview', 'encoding']}
+        self.remember(key, result)
+        if result['cleaned_df'] is not None:
+            self.write_disk(key, result)
+    
+    def remember(self, key, result):
+        size = result_bytes(result)
+        with self.lock:
+            if key in self.entries:
+                self.forget(key)
+            self.entries[key] = result
+            self.sizes[key] = size
+            self.memory_bytes += size
+            while self.memory_bytes > self.max_memory_bytes:
+                self.forget(next(iter(self.entries)))
+    
+    def forget(self, key):
+        del self.entries[key]
+        self.memory_bytes -= self.sizes.pop(key)
+    
+    def entry_dir(self, key):
+        return os.path.join(self.cache_dir, key)
+    
+    def read_disk(self, key):
+        if not self.cache_dir:
+            return None
+        path = self.entry_dir(key)
+        try:
+            with open(os.path.join(path, 'meta.json'), encoding='utf-8') as meta_file:
+                meta = json.load(meta_file)
+            result = dict(
+                meta,
+                cleaned_df=pd.read_parquet(os.path.join(path, 'cleaned.parquet')),
+                preview=pd.read_parquet(os.path.join(path, 'preview.parquet')),
+                output_path=None
+            )
+        except (OSError, ValueError):
+            return None
+        os.utime(path)
+        return result
+    
+    def write_disk(self, key, result):
+        if not self.cache_dir:
+            return
+        path = self.entry_dir(key)
+        tmp_path = path + '.tmp'
+        try:
+            os.makedirs(tmp_path, exist_ok=True)
+            result['cleaned_df'].to_parquet(os.path.join(tmp_path, 'cleaned.parquet'))
+            result['preview'].to_parquet(os.path.join(tmp_path, 'preview.parquet'))
+            with open(os.path.join(tmp_path, 'meta.json'), 'w', encoding='utf-8') as meta_file:
+                json.dump({name: result[name] for name in ['stats', 'removed', 'encoding']}, meta_file)
+            shutil.rmtree(path, ignore_errors=True)
+            os.replace(tmp_path, path)
+        except (OSError, ValueError, TypeError):
+            # Mixed-type object columns can't always go to Parquet; keep it in memory only.
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            return
+        self.evict()
+    
+    def evict(self):
+        sizes = {}
+        for name in os.listdir(self.cache_dir):
+            path = self.entry_dir(name)
+            if os.path.isdir(path) and not name.endswith('.tmp'):
+                sizes[path] = sum(entry.stat().st_size for entry in os.scandir(path))
+        total = sum(sizes.values())
+        for path in sorted(sizes, key=os.path.getmtime):
+            if total <= self.max_disk_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= sizes[path]
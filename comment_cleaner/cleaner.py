@@ -0,0 +1,877 @@
+import multiprocessing
+import re
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import chain, repeat
+import unicodedata
+
+import emoji
+import numpy as np
+import pandas as pd
+
+from .dedup import Deduplicator
+from .incremental import text_digest
+from .readers import TEXT_DTYPE
+from .timing import stage, timed_chunks
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:
+    pa = pc = None
+
+URL_REGEX = r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+'
+WWW_REGEX = r'www\.[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}'
+TAG_CHARS = r'[\w\u4e00-\u9fff\u3040-\u30ff\uac00-\ud7af\u0e00-\u0e7f\u0900-\u097f]'
+MENTION_REGEX = '@' + TAG_CHARS + '+'
+HASHTAG_REGEX = '#' + TAG_CHARS + '+'
+SPECIAL_CHARS_REGEX = r'([!?.]){3,}'
+WHITESPACE_REGEX = r'\s+'
+
+# Workers are started fresh rather than forked: forking a process with other
+# threads running (a Streamlit server, a batch's file threads) can deadlock.
+WORKER_START_METHOD = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+
+URL_PATTERN = re.compile(URL_REGEX)
+WWW_PATTERN = re.compile(WWW_REGEX)
+MENTION_PATTERN = re.compile(MENTION_REGEX)
+HASHTAG_PATTERN = re.compile(HASHTAG_REGEX)
+SPECIAL_CHARS_PATTERN = re.compile(SPECIAL_CHARS_REGEX)
+WHITESPACE_PATTERN = re.compile(WHITESPACE_REGEX)
+
+SCRIPT_TYPES = ['cjk', 'thai', 'devanagari', 'arabic', 'cyrillic', 'latin', 'other', 'unknown']
+SCRIPT_CHARS = {
+    'cjk': '[\u4e00-\u9fff\u3040-\u30ff\uac00-\ud7af]',
+    'thai': '[\u0e00-\u0e7f]',
+    'devanagari': '[\u0900-\u097f]',
+    'arabic': '[\u0600-\u06ff]',
+    'cyrillic': '[\u0400-\u04ff]',
+    'latin': '[A-Za-z]',
+}
+# One scan counts every script; ties go to the earlier entry in SCRIPT_TYPES.
+SCRIPT_PATTERN = re.compile('|'.join(f'(?P<{script}>{chars}+)' for script, chars in SCRIPT_CHARS.items()))
+CJK_CHAR_PATTERN = re.compile(SCRIPT_CHARS['cjk'])
+THAI_CHAR_PATTERN = re.compile(SCRIPT_CHARS['thai'])
+SPACE_PATTERN = re.compile(' ')
+
+# Extra columns clean_dataset adds with metrics=True.
+METRIC_COLUMNS = ['char_count', 'word_count', 'emoji_count', 'script', 'url_count', 'mention_count', 'hashtag_count']
+
+ZWJ = '\u200d'
+VARIATION_SELECTORS = {0xfe0e: None, 0xfe0f: None}
+# A ZWJ after an emoji component (skin tone, hair) can make emoji's
+# tokenizer backtrack in a way no regex reproduces.
+COMPONENT_ZWJ_PATTERN = re.compile('[\U0001f3fb-\U0001f3ff\U0001f9b0-\U0001f9b3]' + ZWJ)
+
+@lru_cache(maxsize=None)
+def get_emoji_pattern():
+    """Compile every sequence in emoji.EMOJI_DATA into one regex, once per process.
+
+    Matches what emoji.replace_emoji removes: the longest known sequence, plus
+    a ZWJ directly after an emoji. Stray variation selectors are left for the
+    caller to drop (see VARIATION_SELECTORS).
+    """
+    trie = {}
+    for sequence in emoji.EMOJI_DATA:
+        node = trie
+        for char in sequence:
+            node = node.setdefault(char, {})
+        node[''] = True
+    
+    def char_class(chars):
+        return '[' + ''.join(re.escape(char) for char in sorted(chars)) + ']'
+    
+    def branch(node, last_char):
+        children = sorted(char for char in node if char)
+        alternatives = [re.escape(char) + branch(node[char], char) for char in children]
+        if '' in node:
+            # Like emoji's tokenizer, a sequence either continues as far as the
+            # data goes or ends here; a ZWJ after it is swallowed when the last
+            # char could itself start an emoji.
+            if last_char in trie:
+                blockers = [char for char in children if char != ZWJ]
+                alternatives.append((f'(?!{char_class(blockers)})' if blockers else '') + ZWJ + '?')
+            else:
+                alternatives.append(f'(?!{char_class(children)})' if children else '')
+        return alternatives[0] if len(alternatives) == 1 else '(?:' + '|'.join(alternatives) + ')'
+    
+    def dispatch(first_chars):
+        # Bisect on code point ranges so a match attempt tests a handful of
+        # ranges instead of every first char in turn.
+        if len(first_chars) <= 16:
+            return '|'.join(re.escape(char) + branch(trie[char], char) for char in first_chars)
+        half = len(first_chars) // 2
+        return '|'.join(
+            f'(?=[{re.escape(part[0])}-{re.escape(part[-1])}])(?:{dispatch(part)})'
+            for part in (first_chars[:half], first_chars[half:])
+        )
+    
+    first_chars = sorted(trie)
+    ranges = []
+    for code in map(ord, first_chars):
+        if ranges and code - ranges[-1][1] <= 64:
+            ranges[-1][1] = code
+        else:
+            ranges.append([code, code])
+    prefilter = ''.join(re.escape(chr(low)) + (f'-{re.escape(chr(high))}' if high > low else '')
+                        for low, high in ranges)
+    return re.compile(f'(?=[{prefilter}])(?:{dispatch(first_chars)})')
+
+# Below this many rows a process pool costs more than it saves.
+PARALLEL_MIN_ROWS = 50000
+
+# Rows per chunk when streaming a CSV; bounds memory instead of the file size.
+STREAM_CHUNK_ROWS = 50000
+
+# How often clean_column reports progress.
+PROGRESS_ROWS = 5000
+
+# Cleaned comments kept in preview_data.
+PREVIEW_ROWS = 100
+
+# Rows scored when no column name says which one holds the comments.
+DETECT_SAMPLE_ROWS = 200
+
+# Minimum score_comment_column for a column to be taken as the comments:
+# about two words of prose per row.
+MIN_COMMENT_SCORE = 2.0
+
+# Values of this many words or fewer, every one capitalized, read as names
+# ('Jane Doe', 'New York') rather than comments.
+MAX_NAME_WORDS = 4
+
+def to_re2(regex):
+    """Spell a pattern for Arrow's RE2 engine, where \\w and \\s are ASCII-only."""
+    regex = regex.replace(r'\w', r'\p{L}\p{N}_')
+    regex = regex.replace(r'\s', r'[\t-\r\x1c-\x20\x85\xa0\x{1680}\x{2000}-\x{200a}\x{2028}\x{2029}\x{202f}\x{205f}\x{3000}]')
+    return re.sub(r'\\u([0-9a-fA-F]{4})', r'\\x{\1}', regex)
+
+SPECIAL_CHARS_RE2 = to_re2(SPECIAL_CHARS_REGEX)
+WHITESPACE_RE2 = to_re2(WHITESPACE_REGEX)
+
+@lru_cache(maxsize=None)
+def removal_patterns(remove_url=True, remove_mention=False, remove_hashtag=False):
+    """The enabled removal rules as (compiled Python pattern, RE2 source) pairs.
+
+    They are applied one after another in this order (links, www hosts,
+    mentions, hashtags), each to what the previous one left.
+    """
+    regexes = []
+    if remove_url:
+        regexes += [URL_REGEX, WWW_REGEX]
+    if remove_mention:
+        regexes.append(MENTION_REGEX)
+    if remove_hashtag:
+        regexes.append(HASHTAG_REGEX)
+    return tuple((re.compile(regex), to_re2(regex)) for regex in regexes)
+
+def compact_counts(values):
+    """Non-negative integer counts in the smallest unsigned dtype that holds them."""
+    values = np.asarray(values)
+    return values.astype(np.min_scalar_type(int(values.max())) if len(values) else np.uint8)
+
+def remove_matches(series, pattern):
+    """series.str.replace(pattern, ''); Arrow-backed text is rewritten by RE2."""
+    if is_arrow_string(series):
+        values = pc.replace_substring_regex(pa.array(series.array), pattern=to_re2(pattern.pattern), replacement='')
+        return pd.Series(pd.array(values, dtype=series.dtype), index=series.index, name=series.name)
+    return series.str.replace(pattern, '', regex=True)
+
+def count_matches(series, pattern):
+    """series.str.count(pattern) as a NumPy array; Arrow-backed text is counted by RE2."""
+    if is_arrow_string(series):
+        counts = pc.count_substring_regex(pa.array(series.array), pattern=to_re2(pattern.pattern))
+        return counts.to_numpy(zero_copy_only=False)
+    return series.str.count(pattern).to_numpy()
+
+def is_arrow_string(series):
+    if pa is None:
+        return False
+    dtype = series.dtype
+    if isinstance(dtype, pd.StringDtype):
+        return dtype.storage.startswith('pyarrow')
+    if isinstance(dtype, pd.ArrowDtype):
+        return pa.types.is_string(dtype.pyarrow_dtype) or pa.types.is_large_string(dtype.pyarrow_dtype)
+    return False
+
+class CommentCleaner:
+    """Multilingual social media comment cleaning engine"""
+    
+    def __init__(self, min_char_length=10):
+        self.min_char_length = min_char_length
+        self.cleaning_stats = {}
+        self.removed_rows = {
+            'blank_empty': 0,
+            'too_short': 0,
+            'only_special_chars': 0,
+            'only_emojis': 0,
+            'blocklisted': 0,
+            'duplicate': 0
+        }
+    
+    def count_scripts(self, text):
+        script_counts = dict.fromkeys(SCRIPT_TYPES[:-1], 0)
+        
+        for match in SCRIPT_PATTERN.finditer(text):
+            script_counts[match.lastgroup] += match.end() - match.start()
+        
+        return script_counts
+    
+    def detect_script_type(self, text):
+        if pd.isna(text) or not text:
+            return 'unknown'
+        
+        script_counts = self.count_scripts(str(text))
+        return max(script_counts, key=script_counts.get)
+    
+    def has_meaningful_content(self, text, text_no_emoji=None):
+        if pd.isna(text) or not text:
+            return False
+        
+        if text_no_emoji is None:
+            text_no_emoji, _, _ = self.analyze_emoji(str(text).strip())
+        text_clean = text_no_emoji.strip()
+        
+        if not text_clean:
+            return False
+        
+        letter_count = sum(1 for char in text_clean if unicodedata.category(char).startswith('L'))
+        
+        if letter_count >= 2:
+            return True
+        
+        if all(unicodedata.category(char) in ['Po', 'Ps', 'Pe', 'Pd', 'Pc', 'Sk', 'Sm', 'Zs'] 
+               for char in text_clean if char.strip()):
+            return False
+        
+        return letter_count > 0
+    
+    def get_adaptive_min_length(self, text, script=None):
+        if script is None:
+            script = self.detect_script_type(text)
+        
+        if script == 'cjk':
+            return max(3, self.min_char_length // 3)
+        elif script == 'thai':
+            return max(5, self.min_char_length // 2)
+        elif script in ['devanagari', 'arabic']:
+            return max(5, int(self.min_char_length * 0.6))
+        else:
+            return self.min_char_length
+        
+    def remove_emojis(self, text):
+        if pd.isna(text):
+            return text
+        text_no_emoji, _, _ = self.analyze_emoji(str(text))
+        return text_no_emoji
+    
+    def remove_urls(self, text):
+        if pd.isna(text):
+            return text
+        text = str(text)
+        text = URL_PATTERN.sub('', text)
+        text = WWW_PATTERN.sub('', text)
+        return text
+    
+    def remove_mentions(self, text):
+        if pd.isna(text):
+            return text
+        return MENTION_PATTERN.sub('', str(text))
+    
+    def remove_hashtags(self, text):
+        if pd.isna(text):
+            return text
+        return HASHTAG_PATTERN.sub('', str(text))
+    
+    def clean_whitespace(self, text):
+        if pd.isna(text):
+            return text
+        text = str(text)
+        text = WHITESPACE_PATTERN.sub(' ', text)
+        return text.strip()
+    
+    def remove_special_chars(self, text):
+        if pd.isna(text):
+            return text
+        text = str(text)
+        return SPECIAL_CHARS_PATTERN.sub(r'\1', text)
+    
+    def is_blank_or_empty(self, text):
+        return pd.isna(text) or text == '' or str(text).strip() == ''
+    
+    def is_only_emojis(self, text):
+        if pd.isna(text):
+            return False
+        _, _, emoji_only = self.analyze_emoji(str(text))
+        return emoji_only
+    
+    def analyze_emoji(self, text):
+        """Scan a comment for emoji once.
+
+        Returns (text without emoji, emoji count, whether it was emoji-only).
+        """
+        text_no_emoji, emoji_count = get_emoji_pattern().subn('', text)
+        if emoji_count and COMPONENT_ZWJ_PATTERN.search(text):
+            # Rare enough to hand to emoji itself.
+            text_no_emoji = emoji.replace_emoji(text, replace='')
+        elif '\ufe0e' in text_no_emoji or '\ufe0f' in text_no_emoji:
+            text_no_emoji = text_no_emoji.translate(VARIATION_SELECTORS)
+        return text_no_emoji, emoji_count, not text_no_emoji.strip()
+    
+    def calculate_word_count(self, text, script=None):
+        if pd.isna(text) or not text:
+            return 0
+        
+        text = str(text).strip()
+        if script is None:
+            script = self.detect_script_type(text)
+        
+        if script == 'cjk':
+            return self.count_scripts(text)['cjk']
+        elif script == 'thai':
+            thai_chars = self.count_scripts(text)['thai']
+            return max(1, thai_chars // 4)
+        else:
+            words = text.split()
+            return len([w for w in words if len(w) > 0])
+    
+    def get_invalid_reason(self, cleaned, script=None, text_no_emoji=None):
+        if cleaned == '':
+            return 'blank_empty'
+        
+        if not self.has_meaningful_content(cleaned, text_no_emoji):
+            return 'only_special_chars'
+        
+        adaptive_min = self.get_adaptive_min_length(cleaned, script)
+        
+        if len(cleaned) < adaptive_min:
+            return 'too_short'
+        
+        return None
+    
+    def is_valid_comment(self, text, min_length):
+        if pd.isna(text) or text == '':
+            self.removed_rows['blank_empty'] += 1
+            return False
+        
+        reason = self.get_invalid_reason(str(text).strip())
+        
+        if reason is not None:
+            self.removed_rows[reason] += 1
+            return False
+        
+        return True
+    
+    def transform_text(self, text, remove_url=True, remove_mention=False, remove_hashtag=False):
+        for pattern, _ in removal_patterns(remove_url, remove_mention, remove_hashtag):
+            text = pattern.sub('', text)
+        text = SPECIAL_CHARS_PATTERN.sub(r'\1', text)
+        return WHITESPACE_PATTERN.sub(' ', text).strip()
+    
+    def transform_series(self, series, remove_url=True, remove_mention=False, remove_hashtag=False):
+        """Vectorized transform_text over a whole column; missing values stay missing."""
+        passes = removal_patterns(remove_url, remove_mention, remove_hashtag)
+        
+        if not is_arrow_string(series) and pd.api.types.infer_dtype(series, skipna=True) != 'string':
+            series = series.map(str, na_action='ignore')
+        
+        if is_arrow_string(series):
+            values = pa.array(series.array)
+            for _, regex in passes:
+                values = pc.replace_substring_regex(values, pattern=regex, replacement='')
+            values = pc.replace_substring_regex(values, pattern=SPECIAL_CHARS_RE2, replacement=r'\1')
+            values = pc.replace_substring_regex(values, pattern=WHITESPACE_RE2, replacement=' ')
+            values = pc.utf8_trim(values, characters=' ')
+            return pd.Series(pd.array(values, dtype=series.dtype), index=series.index, name=series.name)
+        
+        for pattern, _ in passes:
+            series = series.str.replace(pattern, '', regex=True)
+        series = series.str.replace(SPECIAL_CHARS_PATTERN, r'\1', regex=True)
+        series = series.str.replace(WHITESPACE_PATTERN, ' ', regex=True)
+        return series.str.strip()
+    
+    def check_comment(self, text, cleaned, remove_emoji=True, blocklisted=False):
+        """Validate an original comment and its transformed text.
+
+        Returns (is_valid, reason, script). Blank input is reported as
+        'blank_input' and, like before, is not part of the removal breakdown;
+        script is None for comments dropped before the validity rules.
+        blocklisted says the cleaned text hit a drop blocklist.
+        """
+        if text.__class__ is not str:
+            if pd.isna(text):
+                return False, 'blank_input', None
+            text = str(text)
+        
+        if not text.strip():
+            return False, 'blank_input', None
+        
+        if blocklisted:
+            return False, 'blocklisted', None
+        
+        # The transform never touches emoji, so an emoji-only comment is one
+        # whose cleaned text is emoji-only and lost nothing but whitespace.
+        cleaned_no_emoji, _, emoji_only = self.analyze_emoji(cleaned)
+        if remove_emoji and emoji_only and len(''.join(text.split())) == len(''.join(cleaned.split())):
+            return False, 'only_emojis', None
+        
+        script = self.detect_script_type(cleaned)
+        reason = self.get_invalid_reason(cleaned, script, cleaned_no_emoji)
+        return reason is None, reason, script
+    
+    def clean_comment(self, text, remove_emoji=True, remove_url=True,
+                      remove_mention=False, remove_hashtag=False, blocklist=None):
+        """Run one comment through every enabled rule in a single pass.
+
+        Returns (cleaned_text, is_valid, reason).
+        """
+        cleaned = text
+        blocklisted = False
+        if isinstance(text, str) or not pd.isna(text):
+            cleaned = self.transform_text(str(text), remove_url, remove_mention, remove_hashtag)
+            if blocklist is not None and blocklist.action == 'mask':
+                cleaned = blocklist.mask(cleaned)
+            elif blocklist is not None:
+                blocklisted = blocklist.search(cleaned)
+        
+        is_valid, reason, _ = self.check_comment(text, cleaned, remove_emoji, blocklisted)
+        return cleaned, is_valid, reason
+    
+    def clean_column(self, comments, remove_emoji=True, remove_url=True,
+                     remove_mention=False, remove_hashtag=False, progress=None, counts=None, timer=None,
+                     reasons=None, blocklist=None):
+        """Clean a column of comments.
+
+        Returns (keep, cleaned_comments, scripts, removed): a boolean keep
+        mask, the cleaned text and script of the kept rows, and the number
+        of dropped rows per removal reason. progress, if given, is called
+        with the number of rows finished every PROGRESS_ROWS rows. counts,
+        if given, is how many rows each comment stands for (see
+        clean_column_deduped) and weights removed and progress. timer, a
+        StageTimer, records the 'transform', 'blocklist' and 'validate'
+        stages. reasons, if a list, gets every row's removal reason (None if
+        kept). With a Blocklist, matching comments are dropped as
+        'blocklisted' or have the matches masked, per its action.
+        """
+        keep = np.zeros(len(comments), dtype=bool)
+        cleaned_comments = []
+        scripts = []
+        removed = dict.fromkeys(self.removed_rows, 0)
+        # Block by block, so only PROGRESS_ROWS comments exist as Python strings at once.
+        for start in range(0, len(comments), PROGRESS_ROWS):
+            block = comments.iloc[start:start + PROGRESS_ROWS]
+            with stage(timer, 'transform', len(block)):
+                texts = block.tolist()
+                transformed = self.transform_series(block, remove_url, remove_mention, remove_hashtag).tolist()
+            
+            blocked = repeat(False)
+            if blocklist is not None:
+                with stage(timer, 'blocklist', len(block)):
+                    if blocklist.action == 'mask':
+                        transformed = [blocklist.mask(cleaned) if cleaned.__class__ is str else cleaned
+                                       for cleaned in transformed]
+                    else:
+                        blocked = [cleaned.__class__ is str and blocklist.search(cleaned) for cleaned in transformed]
+            
+            with stage(timer, 'validate', len(block)) as record:
+                kept_before = len(cleaned_comments)
+                block_keep = []
+                for idx, (text, cleaned, blocklisted) in enumerate(zip(texts, transformed, blocked), start):
+                    is_valid, reason, script = self.check_comment(text, cleaned, remove_emoji, blocklisted)
+                    block_keep.append(is_valid)
+                    if reasons is not None:
+                        reasons.append(reason)
+                    if is_valid:
+                        cleaned_comments.append(cleaned)
+                        scripts.append(script)
+                    elif reason in removed:
+                        removed[reason] += 1 if counts is None else counts[idx]
+                keep[start:start + len(block)] = block_keep
+                record['rows_out'] = len(cleaned_comments) - kept_before
+            if progress is not None:
+                progress(len(block) if counts is None else sum(counts[start:start + PROGRESS_ROWS]))
+        
+        return keep, cleaned_comments, scripts, removed
+    
+    def clean_column_parallel(self, comments, workers, options, progress=None, counts=None):
+        """clean_column over row chunks in a process pool, merged in order."""
+        chunk_size = -(-len(comments) // (workers * 4))
+        starts = range(0, len(comments), chunk_size)
+        chunks = [comments.iloc[start:start + chunk_size].reset_index(drop=True) for start in starts]
+        chunk_counts = [counts[start:start + chunk_size] for start in starts] if counts is not None else None
+        chunk_rows = [len(chunk) for chunk in chunks] if counts is None else [int(sum(c)) for c in chunk_counts]
+        
+        keep = []
+        cleaned_comments = []
+        scripts = []
+        removed = dict.fromkeys(self.removed_rows, 0)
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(WORKER_START_METHOD)) as executor:
+            results = executor.map(clean_chunk, chunks, chunk_counts or repeat(None),
+                                   repeat(self.min_char_length), repeat(options))
+            for rows, (chunk_keep, chunk_cleaned, chunk_scripts, chunk_removed) in zip(chunk_rows, results):
+                keep.append(chunk_keep)
+                cleaned_comments += chunk_cleaned
+                scripts += chunk_scripts
+                for reason, count in chunk_removed.items():
+                    removed[reason] += count
+                if progress is not None:
+                    progress(rows)
+        
+        return np.concatenate(keep) if keep else np.zeros(0, dtype=bool), cleaned_comments, scripts, removed
+    
+    def clean_column_deduped(self, comments, workers, options, progress=None, timer=None):
+        """clean_column on each distinct comment once, broadcast back to every row.
+
+        Same output as clean_column; removed still counts rows, not distinct values.
+        """
+        with stage(timer, 'factorize', len(comments)) as record:
+            if not is_arrow_string(comments) and pd.api.types.infer_dtype(comments, skipna=True) != 'string':
+                # Non-strings are cleaned as str(value), so 1 and 1.0 must stay apart.
+                comments = comments.map(str, na_action='ignore')
+            codes, uniques = pd.factorize(comments)
+            uniques = pd.Series(uniques)
+            counts = np.bincount(codes[codes >= 0], minlength=len(uniques)).tolist()
+            record['rows_out'] = len(uniques)
+        
+        if workers > 1 and len(uniques) >= PARALLEL_MIN_ROWS:
+            with stage(timer, 'clean_parallel', len(uniques)):
+                unique_keep, unique_cleaned, unique_scripts, removed = self.clean_column_parallel(
+                    uniques, workers, options, progress, counts)
+        else:
+            unique_keep, unique_cleaned, unique_scripts, removed = self.clean_column(
+                uniques, progress=progress, counts=counts, timer=timer, **options)
+        if progress is not None and len(codes) > sum(counts):
+            progress(len(codes) - sum(counts))
+        
+        # Missing comments have code -1, which picks the appended False.
+        keep = np.append(unique_keep, False)[codes]
+        kept = np.flatnonzero(unique_keep)
+        cleaned_by_code = np.empty(len(uniques), dtype=object)
+        cleaned_by_code[kept] = unique_cleaned
+        scripts_by_code = np.empty(len(uniques), dtype=object)
+        scripts_by_code[kept] = unique_scripts
+        
+        kept_codes = codes[keep]
+        return keep, cleaned_by_code[kept_codes], scripts_by_code[kept_codes], removed
+    
+    def clean_column_incremental(self, comments, store, keys=None, options=None, progress=None, timer=None):
+        """clean_column for only the rows store hasn't seen, merged with its stored results.
+
+        keys identify rows (e.g. an id column's values); without them a row
+        is known by its comment text. Fresh results are added to the store.
+        """
+        options = options or {}
+        with stage(timer, 'store_lookup', len(comments)) as record:
+            digests = [text_digest(text) for text in comments.tolist()]
+            if keys is None:
+                keys = [digest.hex() for digest in digests]
+            else:
+                keys = ['id:' + str(key) for key in keys.tolist()]
+            stored = store.lookup(keys)
+            fresh = [pos for pos, (row, digest) in enumerate(zip(stored, digests)) if row is None or row[0] != digest]
+            record['rows_out'] = len(comments) - len(fresh)
+        if progress is not None and len(comments) > len(fresh):
+            progress(len(comments) - len(fresh))
+        
+        reasons = []
+        fresh_keep, fresh_cleaned, fresh_scripts, _ = self.clean_column(
+            comments.iloc[fresh], progress=progress, timer=timer, reasons=reasons, **options)
+        
+        with stage(timer, 'store_write', len(fresh)):
+            fresh_cleaned_iter = iter(fresh_cleaned)
+            fresh_scripts_iter = iter(fresh_scripts)
+            rows = []
+            for pos, reason, is_valid in zip(fresh, reasons, fresh_keep):
+                cleaned, script = (next(fresh_cleaned_iter), next(fresh_scripts_iter)) if is_valid else (None, None)
+                row = (digests[pos], reason, cleaned, script)
+                stored[pos] = row
+                rows.append((keys[pos],) + row)
+            store.put(rows)
+        
+        keep = np.zeros(len(comments), dtype=bool)
+        cleaned_comments = []
+        scripts = []
+        removed = dict.fromkeys(self.removed_rows, 0)
+        for pos, (_, reason, cleaned, script) in enumerate(stored):
+            if reason is None:
+                keep[pos] = True
+                cleaned_comments.append(cleaned)
+                scripts.append(script)
+            elif reason in removed:
+                removed[reason] += 1
+        return keep, cleaned_comments, scripts, removed
+    
+    def text_metrics(self, cleaned, originals, scripts):
+        """METRIC_COLUMNS for kept comments, as compact unsigned ints and a categorical script.
+
+        Character, word and emoji counts are of the cleaned text, and word
+        counts follow calculate_word_count. URL, mention and hashtag counts
+        are of the original text, taken in the order the removal rules run,
+        so a www host inside a link or a mention inside either isn't counted.
+        cleaned is an object Series of str, originals a Series of str and
+        scripts the matching script categorical, all on one index.
+        """
+        char_count = cleaned.str.len().to_numpy()
+        # Cleaned text is trimmed with its whitespace collapsed to single spaces.
+        spaced_words = count_matches(cleaned, SPACE_PATTERN) + (char_count > 0)
+        thai_words = np.maximum(1, count_matches(cleaned, THAI_CHAR_PATTERN) // 4)
+        word_count = np.select(
+            [(scripts == 'cjk').to_numpy(), (scripts == 'thai').to_numpy()],
+            [count_matches(cleaned, CJK_CHAR_PATTERN), thai_words],
+            spaced_words
+        )
+        
+        without_urls = remove_matches(originals, URL_PATTERN)
+        unlinked = remove_matches(without_urls, WWW_PATTERN)
+        return pd.DataFrame({
+            'char_count': compact_counts(char_count),
+            'word_count': compact_counts(word_count),
+            # The emoji pattern needs lookaheads, which RE2 lacks; cleaned is always object.
+            'emoji_count': compact_counts(cleaned.str.count(get_emoji_pattern())),
+            'script': scripts,
+            'url_count': compact_counts(count_matches(originals, URL_PATTERN) + count_matches(without_urls, WWW_PATTERN)),
+            'mention_count': compact_counts(count_matches(unlinked, MENTION_PATTERN)),
+            'hashtag_count': compact_counts(count_matches(unlinked, HASHTAG_PATTERN)),
+        }, index=cleaned.index)
+    
+    def get_script_breakdown(self, scripts):
+        counts = scripts.value_counts(sort=False)
+        return {script: int(count) for script, count in counts.items() if count}
+    
+    def score_comment_column(self, values):
+        """How much values read like comments: average words of prose per value.
+
+        URLs, structured values (JSON, markup) and names (a few capitalized
+        words, as in an author column) don't count, and other punctuation-heavy
+        text is discounted by its share of non-letters.
+        """
+        score = 0.0
+        for value in values:
+            if value.__class__ is not str:
+                continue
+            text = self.remove_urls(value).strip()
+            if text[:1] in ('{', '[', '<') or not self.has_meaningful_content(text):
+                continue
+            if text.istitle() and len(text.split()) <= MAX_NAME_WORDS:
+                continue
+            prose = sum(1 for char in text if char.isalpha() or char.isspace()) / len(text)
+            score += min(self.calculate_word_count(text), 20) * prose
+        return score / max(len(values), 1)
+    
+    def detect_comment_column(self, df):
+        """The comment column by name, else the text column whose first rows score best."""
+        columns_lower = [str(col).lower() for col in df.columns]
+        
+        comment_keywords = ['text', 'comment', 'content', 'message', 'caption',
+                           '评论', '內容', 'コメント', 'ความคิดเห็น', 'टिप्पणी']
+        
+        for keyword in comment_keywords:
+            if keyword in columns_lower:
+                idx = columns_lower.index(keyword)
+                return df.columns[idx]
+        
+        sample = df.head(DETECT_SAMPLE_ROWS)
+        scores = {}
+        for idx, column in enumerate(sample.columns):
+            values = sample.iloc[:, idx]
+            if pd.api.types.is_numeric_dtype(values) or pd.api.types.is_datetime64_any_dtype(values):
+                continue
+            scores[column] = self.score_comment_column(values.tolist())
+        best = max(scores, key=scores.get, default=None)
+        if best is not None and scores[best] >= MIN_COMMENT_SCORE:
+            return best
+        return None
+    
+    def clean_dataset(self, df, comment_column=None, remove_emoji=True, remove_url=True,
+                     remove_mention=False, remove_hashtag=False, min_length=None, workers=1,
+                     progress=None, dedupe=False, remove_duplicates=False, near_duplicate_threshold=None,
+                     deduplicator=None, timer=None, store=None, key_column=None, column_result=None,
+                     blocklist=None, metrics=False):
+        """Clean df and drop invalid comments. Returns (df_cleaned, error).
+
+        With remove_duplicates, comments whose normalized cleaned text repeats
+        an earlier one (or, with near_duplicate_threshold, is that similar to
+        one) are dropped as 'duplicate'. Pass a Deduplicator to share what has
+        been seen across calls, e.g. across the files of a batch.
+        Pass a StageTimer as timer to record how long each stage took.
+        With a RowStore as store, only rows it hasn't seen (by key_column,
+        else by comment text) are cleaned; the rest reuse stored results.
+        column_result, a clean_column result for df[comment_column] computed
+        elsewhere (e.g. within a larger batch), is used instead of cleaning.
+        A Blocklist drops (as 'blocklisted') or masks comments with its phrases.
+        With metrics, the METRIC_COLUMNS (see text_metrics) are appended,
+        replacing any columns of the same name.
+        """
+        
+        if comment_column is None:
+            comment_column = self.detect_comment_column(df)
+            if comment_column is None:
+                return None, "Could not detect comment column. Available columns: " + ", ".join(df.columns)
+        
+        if comment_column not in df.columns:
+            return None, f"Column '{comment_column}' not found in dataset"
+        
+        if key_column is not None and key_column not in df.columns:
+            return None, f"Row key column '{key_column}' not found in dataset"
+        
+        if min_length is None:
+            min_length = self.min_char_length
+        
+        original_count = len(df)
+        original_comment_col = comment_column
+        
+        self.removed_rows = {
+            'blank_empty': 0, 'too_short': 0,
+            'only_special_chars': 0, 'only_emojis': 0,
+            'blocklisted': 0, 'duplicate': 0
+        }
+        
+        options = {
+            'remove_emoji': remove_emoji, 'remove_url': remove_url,
+            'remove_mention': remove_mention, 'remove_hashtag': remove_hashtag,
+            'blocklist': blocklist
+        }
+        
+        if column_result is not None:
+            keep, cleaned_comments, scripts, removed = column_result
+        elif store is not None:
+            keep, cleaned_comments, scripts, removed = self.clean_column_incremental(
+                df[comment_column], store, df[key_column] if key_column is not None else None, options, progress, timer)
+        elif dedupe:
+            keep, cleaned_comments, scripts, removed = self.clean_column_deduped(
+                df[comment_column], workers, options, progress, timer)
+        elif workers > 1 and original_count >= PARALLEL_MIN_ROWS:
+            with stage(timer, 'clean_parallel', original_count) as record:
+                keep, cleaned_comments, scripts, removed = self.clean_column_parallel(
+                    df[comment_column], workers, options, progress)
+                record['rows_out'] = len(cleaned_comments)
+        else:
+            keep, cleaned_comments, scripts, removed = self.clean_column(
+                df[comment_column], progress=progress, timer=timer, **options)
+        
+        for reason, count in removed.items():
+            self.removed_rows[reason] += count
+        
+        if deduplicator is None and remove_duplicates:
+            deduplicator = Deduplicator(near_duplicate_threshold)
+        if deduplicator is not None:
+            with stage(timer, 'duplicates', len(cleaned_comments)) as record:
+                duplicate = deduplicator.mark(cleaned_comments)
+                if duplicate.any():
+                    keep[np.flatnonzero(keep)[duplicate]] = False
+                    cleaned_comments = np.asarray(cleaned_comments, dtype=object)[~duplicate]
+                    scripts = np.asarray(scripts, dtype=object)[~duplicate]
+                self.removed_rows['duplicate'] += int(duplicate.sum())
+                record['rows_out'] = len(cleaned_comments)
+        
+        with stage(timer, 'materialize', original_count) as record:
+            # The kept rows of every other column are taken once; the original
+            # comment column is never copied, only replaced by the cleaned text.
+            position = df.columns.get_loc(comment_column)
+            others = [idx for idx in range(len(df.columns)) if idx != position]
+            df_cleaned = df.iloc[np.flatnonzero(keep), others]
+            # Arrow-backed text stays Arrow-backed; anything else comes out as str.
+            comment_dtype = df[comment_column].dtype if is_arrow_string(df[comment_column]) else str
+            df_cleaned.insert(position, original_comment_col,
+                              pd.Series(cleaned_comments, index=df_cleaned.index, dtype=comment_dtype))
+            self.script_data = pd.Series(pd.Categorical(scripts, categories=SCRIPT_TYPES),
+                                         index=df_cleaned.index, name='script')
+            record['rows_out'] = len(df_cleaned)
+        
+        if metrics:
+            with stage(timer, 'metrics', len(df_cleaned)):
+                originals = df[comment_column].iloc[np.flatnonzero(keep)].set_axis(df_cleaned.index)
+                if not is_arrow_string(originals):
+                    originals = originals.astype(object).map(str)
+                cleaned = pd.Series(cleaned_comments, index=df_cleaned.index, dtype=object)
+                for name, values in self.text_metrics(cleaned, originals, self.script_data).items():
+                    if name in df_cleaned.columns and name != original_comment_col:
+                        del df_cleaned[name]
+                    df_cleaned.insert(len(df_cleaned.columns), name, values, allow_duplicates=True)
+        
+        final_count = len(df_cleaned)
+        self.cleaning_stats = {
+            'original_count': original_count,
+            'final_count': final_count,
+            'total_removed': original_count - final_count,
+            'retention_rate': round((final_count / original_count) * 100, 2) if original_count > 0 else 0,
+            'script_breakdown': self.get_script_breakdown(self.script_data)
+        }
+        
+        # A small slice, not a second copy of the whole cleaned column.
+        self.preview_data = df_cleaned[[original_comment_col]].head(PREVIEW_ROWS).rename(
+            columns={original_comment_col: 'cleaned_comment'})
+        
+        return df_cleaned, None
+    
+    def clean_csv_stream(self, source, destination, comment_column=None, encoding='utf-8',
+                         chunksize=STREAM_CHUNK_ROWS, preview_rows=PREVIEW_ROWS, columns=None, **options):
+        """Clean a CSV chunk by chunk, appending kept rows to destination.
+
+        Memory stays bounded by chunksize. removed_rows, cleaning_stats and
+        preview_data cover the whole file. columns, if given, are the only
+        ones parsed. Options are those of clean_dataset.
+        """
+        with open(destination, 'w', encoding='utf-8-sig', newline='') as out:
+            dtype = {comment_column: TEXT_DTYPE} if comment_column is not None else None
+            chunks = pd.read_csv(source, encoding=encoding, chunksize=chunksize, usecols=columns, dtype=dtype)
+            chunks = timed_chunks(options.get('timer'), 'read', chunks)
+            first = next(chunks, None)
+            if first is not None and comment_column is None:
+                comment_column = self.detect_comment_column(first)
+                if comment_column is None:
+                    return "Could not detect comment column. Available columns: " + ", ".join(first.columns)
+            
+            def write(cleaned_chunk, chunk_idx):
+                with stage(options.get('timer'), 'write', len(cleaned_chunk)):
+                    cleaned_chunk.to_csv(out, index=False, header=chunk_idx == 0)
+            
+            frames = ((comment_column, chunk) for chunk in chain([first] if first is not None else [], chunks))
+            return self.clean_frames(frames, write, preview_rows, **options)
+    
+    def clean_frames(self, frames, write, preview_rows=PREVIEW_ROWS, **options):
+        """clean_dataset over (comment_column, df) pairs, handing each cleaned df to write(df, chunk_idx).
+
+        removed_rows, cleaning_stats and preview_data cover every frame, and
+        duplicates are removed across them. Returns an error or None.
+        """
+        removed_rows = dict.fromkeys(self.removed_rows, 0)
+        script_counts = dict.fromkeys(SCRIPT_TYPES, 0)
+        if options.get('remove_duplicates') and options.get('deduplicator') is None:
+            # One index for the whole file, not one per chunk.
+            options['deduplicator'] = Deduplicator(options.get('near_duplicate_threshold'))
+        original_count = 0
+        final_count = 0
+        previews = []
+        
+        for chunk_idx, (comment_column, chunk) in enumerate(frames):
+            cleaned_chunk, error = self.clean_dataset(chunk, comment_column=comment_column, **options)
+            if error:
+                return error
+            
+            write(cleaned_chunk, chunk_idx)
+            
+            original_count += self.cleaning_stats['original_count']
+            final_count += self.cleaning_stats['final_count']
+            for reason, count in self.removed_rows.items():
+                removed_rows[reason] += count
+            for script, count in self.cleaning_stats['script_breakdown'].items():
+                script_counts[script] += count
+            if sum(len(preview) for preview in previews) < preview_rows:
+                previews.append(self.preview_data.head(preview_rows))
+        
+        self.removed_rows = removed_rows
+        self.cleaning_stats = {
+            'original_count': original_count,
+            'final_count': final_count,
+            'total_removed': original_count - final_count,
+            'retention_rate': round((final_count / original_count) * 100, 2) if original_count > 0 else 0,
+            'script_breakdown': {script: count for script, count in script_counts.items() if count}
+        }
+        self.preview_data = (pd.concat(previews, ignore_index=True).head(preview_rows) if previews
+                             else pd.DataFrame(columns=['cleaned_comment']))
+        
+        return None
+
+def clean_chunk(comments, counts, min_char_length, options):
+    return CommentCleaner(min_char_length=min_char_length).clean_column(comments, counts=counts, **options)
@@ -0,0 +1,162 @@
+"""Batch cleaning from the command line: python -m comment_cleaner PATH [PATH ...]"""
+
+import argparse
+import os
+import sys
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog='comment_cleaner',
+        description='Clean social media comment exports (CSV/Excel/Parquet/Feather files or directories of them).'
+    )
+    parser.add_argument('paths', nargs='+', help='Files or directories to clean')
+    parser.add_argument('-o', '--output-dir', default='.', help='Where cleaned files are written (default: current directory)')
+    parser.add_argument('--format', choices=['csv', 'parquet', 'feather'], default='csv', help='Output format (default: csv)')
+    parser.add_argument('--column', default=None, help='Comment column (default: auto-detect)')
+    parser.add_argument('--keep-column', action='append', help='Load and keep only the comment column plus these, repeatable (default: all)')
+    parser.add_argument('--min-length', type=int, default=10, help='Minimum character length (default: 10)')
+    parser.add_argument('--remove-emoji', action=argparse.BooleanOptionalAction, default=True, help='Remove emoji-only comments')
+    parser.add_argument('--remove-url', action=argparse.BooleanOptionalAction, default=True, help='Remove URLs')
+    parser.add_argument('--remove-mention', action=argparse.BooleanOptionalAction, default=False, help='Remove @mentions')
+    parser.add_argument('--remove-hashtag', action=argparse.BooleanOptionalAction, default=False, help='Remove #hashtags')
+    parser.add_argument('--remove-duplicates', action='store_true', help='Drop repeated comments, keeping the first')
+    parser.add_argument('--near-duplicates', type=float, default=None, metavar='SIMILARITY',
+                        help='With --remove-duplicates, also drop comments this similar (0-1) to an earlier one')
+    parser.add_argument('--across-files', action='store_true', help='With --remove-duplicates, dedup across all input files')
+    parser.add_argument('--blocklist', action='append', metavar='FILE',
+                        help='Phrase file, one phrase per line; comments containing any are dropped (repeatable)')
+    parser.add_argument('--blocklist-action', choices=['drop', 'mask'], default='drop',
+                        help='Drop blocklisted comments or mask the matched phrases (default: drop)')
+    parser.add_argument('--metrics', action='store_true',
+                        help='Add character, word, emoji, URL, mention and hashtag counts and the script of each comment')
+    parser.add_argument('--workers', type=int, default=1, help='Worker processes for large files (default: 1)')
+    parser.add_argument('--dedupe', action=argparse.BooleanOptionalAction, default=True, help='Clean each distinct comment once')
+    parser.add_argument('--stream', action='store_true', help='Clean CSVs chunk by chunk with bounded memory')
+    parser.add_argument('--split', action='store_true', help='Also write the cleaned rows as a ZIP of fixed-size parts')
+    parser.add_argument('--part-rows', type=int, default=10000, help='Rows per part with --split (default: 10000)')
+    parser.add_argument('--part-format', action='append', choices=['csv', 'xlsx'], help='Part file format, repeatable (default: csv)')
+    parser.add_argument('--incremental', default=None, metavar='STORE',
+                        help='Only clean rows not already in this SQLite file; any option change starts it over')
+    parser.add_argument('--id-column', default=None,
+                        help='With --incremental, the column identifying a row (default: match on comment text)')
+    parser.add_argument('--timings', default=None, metavar='PATH',
+                        help='Append per-stage wall time and rows/sec for each file to PATH as JSON lines')
+    parser.add_argument('--cache-dir', default=None, help='Reuse results for unchanged files and options (Parquet, needs pyarrow)')
+    return parser
+
+def collect_files(paths):
+    from .readers import SUPPORTED_EXTENSIONS, get_extension
+    
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                full_path = os.path.join(path, name)
+                if os.path.isfile(full_path) and get_extension(name) in SUPPORTED_EXTENSIONS:
+                    files.append(full_path)
+        else:
+            files.append(path)
+    return files
+
+def clean_file(path, output_path, args, cache=None, deduplicator=None, timer=None, blocklist=None):
+    # Deferred so that --help and argument errors never pay for pandas.
+    from .pipeline import clean_source
+    from .readers import get_extension
+    from .timing import stage
+    
+    options = dict(
+        remove_emoji=args.remove_emoji, remove_url=args.remove_url,
+        remove_mention=args.remove_mention, remove_hashtag=args.remove_hashtag,
+        min_length=args.min_length, workers=args.workers, dedupe=args.dedupe,
+        remove_duplicates=args.remove_duplicates, near_duplicate_threshold=args.near_duplicates,
+        deduplicator=deduplicator, blocklist=blocklist, metrics=args.metrics
+    )
+    file_extension = get_extension(path)
+    
+    with open(path, 'rb') as source:
+        result, error = clean_source(
+            source, file_extension, options, comment_column=args.column, keep_columns=args.keep_column,
+            stream_to=output_path if args.stream else None, cache=cache, timer=timer,
+            row_store=args.incremental, key_column=args.id_column
+        )
+    if error:
+        return None, error
+    
+    if result['cleaned_df'] is not None:
+        with stage(timer, f"export_{args.format}", len(result['cleaned_df'])):
+            if args.format == 'csv':
+                result['cleaned_df'].to_csv(output_path, index=False, encoding='utf-8-sig')
+            else:
+                from .export import write_feather, write_parquet
+                
+                {'parquet': write_parquet, 'feather': write_feather}[args.format](result['cleaned_df'], output_path)
+    
+    if args.split:
+        from .export import iter_csv_parts, iter_parts, write_split_zip
+        
+        with stage(timer, 'export_zip', result['stats']['final_count']):
+            if result['cleaned_df'] is not None:
+                parts = iter_parts(result['cleaned_df'], args.part_rows)
+            else:
+                parts = iter_csv_parts(output_path, args.part_rows)
+            base_name = os.path.basename(output_path).rsplit('.', 1)[0]
+            write_split_zip(parts, os.path.join(os.path.dirname(output_path), f"{base_name}_parts.zip"),
+                            base_name, tuple(args.part_format or ['csv']))
+    return result, None
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.stream and args.format != 'csv':
+        parser.error("--stream writes CSV; drop --format or --stream")
+    files = collect_files(args.paths)
+    if not files:
+        print("No supported files found", file=sys.stderr)
+        return 1
+    
+    os.makedirs(args.output_dir, exist_ok=True)
+    
+    deduplicator = None
+    if args.remove_duplicates and args.across_files:
+        from .dedup import Deduplicator
+        deduplicator = Deduplicator(args.near_duplicates)
+    
+    blocklist = None
+    if args.blocklist:
+        from .blocklist import Blocklist
+        blocklist = Blocklist.from_files(args.blocklist, args.blocklist_action)
+    
+    cache = None
+    if args.cache_dir:
+        from .cache import ResultCache
+        cache = ResultCache(cache_dir=args.cache_dir)
+    
+    failed = 0
+    for path in files:
+        base_name = os.path.basename(path).rsplit('.', 1)[0]
+        output_path = os.path.join(args.output_dir, f"{base_name}_cleaned.{args.format}")
+        timer = None
+        if args.timings:
+            from .timing import StageTimer
+            timer = StageTimer()
+        try:
+            result, error = clean_file(path, output_path, args, cache, deduplicator, timer, blocklist)
+        except Exception as e:
+            result, error = None, str(e)
+        
+        if error:
+            failed += 1
+            print(f"❌ {path}: {error}", file=sys.stderr)
+            continue
+        
+        stats = result['stats']
+        print(f"✅ {path} -> {output_path}: {stats['original_count']:,} rows, "
+              f"{stats['final_count']:,} kept ({stats['retention_rate']}% retention)"
+              + (f", read as {result['encoding']}" if result['encoding'] else ""))
+        
+        if timer is not None:
+            timer.log(file=path)
+            with open(args.timings, 'a', encoding='utf-8') as timings_file:
+                timings_file.write(timer.to_json(file=path) + '\n')
+    
+    return 1 if failed else 0
@@ -0,0 +1,114 @@
+"""Exact and near-duplicate detection for cleaned comments."""
+
+import numpy as np
+import pandas as pd
+
+# Character shingles work for scripts without spaces (CJK, Thai) as well as Latin.
+SHINGLE_SIZE = 5
+NUM_PERM = 64
+SHINGLE_BASE = np.uint64(1000003)
+
+def normalize_for_dedup(texts):
+    """Case-folded NFKC text with punctuation dropped and whitespace collapsed."""
+    texts = pd.Series(texts, dtype=object).str.normalize('NFKC').str.casefold()
+    return texts.str.replace(r'[\W_]+', ' ', regex=True).str.strip()
+
+def choose_bands(num_perm, threshold):
+    """(bands, rows) whose LSH S-curve crosses 50% closest to threshold."""
+    options = [(num_perm // rows, rows) for rows in range(1, num_perm + 1) if num_perm % rows == 0]
+    return min(options, key=lambda option: abs((1 / option[0]) ** (1 / option[1]) - threshold))
+
+class Deduplicator:
+    """Flags comments already seen, keeping the first occurrence.
+
+    Exact duplicates are found through a hash index of normalized text. With
+    near_threshold set, MinHash signatures over character shingles are
+    bucketed by LSH bands, and a comment is also a duplicate when an earlier
+    kept comment sharing a bucket has estimated Jaccard similarity of at
+    least near_threshold. State carries over between mark() calls, so one
+    instance can span the chunks of a stream or every file in a batch.
+    """
+    
+    def __init__(self, near_threshold=None, num_perm=NUM_PERM, shingle_size=SHINGLE_SIZE, seed=1):
+        self.near_threshold = near_threshold
+        self.shingle_size = shingle_size
+        self.seen = set()
+        if near_threshold is not None:
+            # Odd multipliers and offsets for multiply-shift hashing, one pair per permutation.
+            rng = np.random.default_rng(seed)
+            self.perm_a = rng.integers(0, 1 << 63, size=num_perm, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+            self.perm_b = rng.integers(0, 1 << 63, size=num_perm, dtype=np.uint64)
+            self.bands, self.band_rows = choose_bands(num_perm, near_threshold)
+            self.band_weights = rng.integers(0, 1 << 63, size=self.band_rows, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+            self.buckets = [{} for _ in range(self.bands)]
+            self.signatures = []
+    
+    def signatures_for(self, texts, batch_size=2000):
+        """MinHash signatures (one uint32 row per text), computed a batch of texts at a time.
+
+        Each text's shingles are the windows of shingle_size code points
+        (short texts are padded to one window). Windows are hashed as
+        polynomials over code points and permuted with multiply-shift hashing,
+        all as array operations over the batch.
+        """
+        size = self.shingle_size
+        signatures = np.empty((len(texts), len(self.perm_a)), dtype=np.uint32)
+        for start in range(0, len(texts), batch_size):
+            batch = [text.ljust(size, '\0') for text in texts[start:start + batch_size]]
+            code_points = np.frombuffer('\0'.join(batch).encode('utf-32-le'), dtype=np.uint32).astype(np.uint64)
+            
+            window_counts = np.array([len(text) - size + 1 for text in batch])
+            text_starts = np.concatenate(([0], np.cumsum([len(text) + 1 for text in batch])[:-1]))
+            # Start offset of every window, text by text, never crossing a separator.
+            window_offsets = np.concatenate(([0], np.cumsum(window_counts)[:-1]))
+            window_starts = np.arange(window_counts.sum()) - np.repeat(window_offsets - text_starts, window_counts)
+            
+            with np.errstate(over='ignore'):
+                hashes = np.zeros(len(window_starts), dtype=np.uint64)
+                for offset in range(size):
+                    hashes = hashes * SHINGLE_BASE + code_points[window_starts + offset]
+                permuted = (np.outer(self.perm_a, hashes) + self.perm_b[:, None]) >> np.uint64(32)
+            signatures[start:start + len(batch)] = np.minimum.reduceat(permuted, window_offsets, axis=1).T
+        return signatures
+    
+    def band_keys(self, signatures):
+        """One integer per LSH band per signature; equal bands give equal keys."""
+        bands = signatures.reshape(len(signatures), self.bands, self.band_rows).astype(np.uint64)
+        with np.errstate(over='ignore'):
+            return (bands * self.band_weights).sum(axis=2)
+    
+    def is_near_duplicate(self, signature, keys):
+        checked = set()
+        for buckets, key in zip(self.buckets, keys):
+            for candidate in buckets.get(key, ()):
+                if candidate in checked:
+                    continue
+                checked.add(candidate)
+                if np.mean(self.signatures[candidate] == signature) >= self.near_threshold:
+                    return True
+        
+        candidate = len(self.signatures)
+        self.signatures.append(signature)
+        for buckets, key in zip(self.buckets, keys):
+            buckets.setdefault(key, []).append(candidate)
+        return False
+    
+    def mark(self, texts):
+        """Boolean array, True where a text duplicates an earlier one (in this call or before)."""
+        normalized = normalize_for_dedup(texts).tolist()
+        hashes = pd.util.hash_array(np.array(normalized, dtype=object)).tolist()
+        
+        duplicate = np.zeros(len(hashes), dtype=bool)
+        first = []
+        for idx, text_hash in enumerate(hashes):
+            if text_hash in self.seen:
+                duplicate[idx] = True
+            else:
+                self.seen.add(text_hash)
+                first.append(idx)
+        
+        if self.near_threshold is not None and first:
+            signatures = self.signatures_for([normalized[idx] for idx in first])
+            for idx, signature, keys in zip(first, signatures, self.band_keys(signatures).tolist()):
+                duplicate[idx] = self.is_near_duplicate(signature, keys)
+        return duplicate
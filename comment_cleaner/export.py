@@ -0,0 +1,116 @@
+"""CSV and Excel writers that work through a frame in row chunks."""
+
+import io
+import json
+import zipfile
+
+import pandas as pd
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font
+
+# Rows converted per step; bounds the temporary text/objects held at once.
+EXPORT_CHUNK_ROWS = 50000
+
+# Default rows per file in a split export.
+SPLIT_PART_ROWS = 10000
+
+EXCEL_MIME = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+def write_csv(df, target, chunk_rows=EXPORT_CHUNK_ROWS):
+    """Write df as BOM-prefixed utf-8 CSV to a binary file-like object."""
+    target.write('\ufeff'.encode('utf-8'))
+    for start in range(0, max(len(df), 1), chunk_rows):
+        chunk = df.iloc[start:start + chunk_rows]
+        target.write(chunk.to_csv(index=False, header=start == 0).encode('utf-8'))
+
+def write_excel(df, target, chunk_rows=EXPORT_CHUNK_ROWS, sheet_title='Sheet1'):
+    """Write df as an .xlsx to a path or binary file-like object with openpyxl's write-only mode."""
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(sheet_title)
+    header = []
+    for column in df.columns:
+        cell = WriteOnlyCell(sheet, value=str(column))
+        cell.font = Font(bold=True)
+        header.append(cell)
+    sheet.append(header)
+    
+    for start in range(0, len(df), chunk_rows):
+        chunk = df.iloc[start:start + chunk_rows].astype(object)
+        chunk = chunk.where(chunk.notna(), None)
+        for row in chunk.itertuples(index=False, name=None):
+            sheet.append(row)
+    
+    workbook.save(target)
+
+def arrow_safe(df):
+    """df with object columns Arrow can't type (mixed values) turned into strings."""
+    import pyarrow as pa
+    
+    safe_df = df
+    for column in df.columns[df.dtypes == object]:
+        try:
+            pa.array(df[column], from_pandas=True)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            if safe_df is df:
+                safe_df = df.copy()
+            safe_df[column] = df[column].map(str, na_action='ignore')
+    return safe_df
+
+def write_parquet(df, target):
+    arrow_safe(df).to_parquet(target, index=False)
+
+def write_feather(df, target):
+    arrow_safe(df).reset_index(drop=True).to_feather(target)
+
+def to_csv_bytes(df):
+    output = io.BytesIO()
+    write_csv(df, output)
+    return output.getvalue()
+
+def to_excel_bytes(df):
+    output = io.BytesIO()
+    write_excel(df, output)
+    return output.getvalue()
+
+def iter_parts(df, part_rows=SPLIT_PART_ROWS):
+    for start in range(0, len(df), part_rows):
+        yield df.iloc[start:start + part_rows]
+
+def iter_csv_parts(path, part_rows=SPLIT_PART_ROWS):
+    """Parts of a cleaned CSV on disk (a streamed result), read one at a time."""
+    yield from pd.read_csv(path, encoding='utf-8-sig', chunksize=part_rows)
+
+def write_split_zip(parts, target, base_name, formats=('csv',)):
+    """Write each frame in parts as its own CSV and/or XLSX file in a ZIP.
+
+    Parts are written one at a time straight into the archive, so only one
+    part is in memory. manifest.json lists every file with its 1-based,
+    inclusive data row range.
+    """
+    writers = {'csv': write_csv, 'xlsx': write_excel}
+    manifest = {'base_name': base_name, 'formats': list(formats), 'total_rows': 0, 'parts': []}
+    
+    with zipfile.ZipFile(target, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for number, part in enumerate(parts, start=1):
+            first_row = manifest['total_rows'] + 1
+            manifest['total_rows'] += len(part)
+            files = []
+            for export_format in formats:
+                name = f"{base_name}_part{number:03d}.{export_format}"
+                with archive.open(name, 'w', force_zip64=True) as part_file:
+                    writers[export_format](part, part_file)
+                files.append(name)
+            manifest['parts'].append({
+                'part': number, 'files': files, 'rows': len(part),
+                'first_row': first_row, 'last_row': manifest['total_rows']
+            })
+        
+        archive.writestr('manifest.json', json.dumps(manifest, indent=2))
+    
+    return manifest
+
+def to_parquet_bytes(df):
+    output = io.BytesIO()
+    write_parquet(df, output)
+    return output.getvalue()
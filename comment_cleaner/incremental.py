@@ -0,0 +1,80 @@
+"""Per-row cleaning results kept in SQLite, so a re-uploaded export only cleans its new rows."""
+
+import hashlib
+import json
+import sqlite3
+
+import pandas as pd
+
+from .cache import key_settings
+
+# Rows per executemany/lookup batch.
+STORE_BATCH_ROWS = 50000
+
+def options_fingerprint(options, **extra):
+    """Hash of the options that change a row's cleaned result, plus extra settings such as the key column."""
+    settings = key_settings(options)
+    settings.update(extra)
+    return hashlib.blake2b(json.dumps(settings, sort_keys=True).encode(), digest_size=16).hexdigest()
+
+def text_digest(text):
+    # Comments are cleaned as str(value); missing ones all clean the same way.
+    if text.__class__ is not str:
+        text = '' if pd.isna(text) else str(text)
+    return hashlib.blake2b(text.encode('utf-8', 'surrogatepass'), digest_size=16).digest()
+
+class RowStore:
+    """SQLite table of row key -> (comment digest, removal reason, cleaned text, script).
+
+    The table belongs to one options fingerprint; opening it with another
+    fingerprint empties it, so any option change starts over. A stored row
+    is only reused while its comment digest still matches, so an edited
+    comment under a known id is cleaned again.
+    """
+    
+    def __init__(self, path, fingerprint):
+        # Files of one batch are cleaned on separate threads, each with its own store.
+        self.connection = sqlite3.connect(path, timeout=60)
+        with self.connection:
+            self.connection.execute('CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT)')
+            self.connection.execute(
+                'CREATE TABLE IF NOT EXISTS rows '
+                '(key TEXT PRIMARY KEY, digest BLOB, reason TEXT, cleaned TEXT, script TEXT)'
+            )
+            row = self.connection.execute("SELECT value FROM meta WHERE name = 'fingerprint'").fetchone()
+            if row is None or row[0] != fingerprint:
+                self.connection.execute('DELETE FROM rows')
+                self.connection.execute("INSERT OR REPLACE INTO meta VALUES ('fingerprint', ?)", (fingerprint,))
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+    
+    def close(self):
+        self.connection.close()
+    
+    def __len__(self):
+        return self.connection.execute('SELECT COUNT(*) FROM rows').fetchone()[0]
+    
+    def lookup(self, keys):
+        """Stored (digest, reason, cleaned, script) per key, None where unseen."""
+        found = [None] * len(keys)
+        with self.connection:
+            self.connection.execute('CREATE TEMP TABLE IF NOT EXISTS wanted (pos INTEGER PRIMARY KEY, key TEXT)')
+            self.connection.execute('DELETE FROM wanted')
+            for start in range(0, len(keys), STORE_BATCH_ROWS):
+                self.connection.executemany('INSERT INTO wanted VALUES (?, ?)',
+                                            enumerate(keys[start:start + STORE_BATCH_ROWS], start))
+            query = ('SELECT wanted.pos, rows.digest, rows.reason, rows.cleaned, rows.script '
+                     'FROM wanted JOIN rows ON rows.key = wanted.key')
+            for pos, *stored in self.connection.execute(query):
+                found[pos] = tuple(stored)
+            self.connection.execute('DELETE FROM wanted')
+        return found
+    
+    def put(self, rows):
+        """Store (key, digest, reason, cleaned, script) tuples, replacing earlier results for the same keys."""
+        with self.connection:
+            self.connection.executemany('INSERT OR REPLACE INTO rows VALUES (?, ?, ?, ?, ?)', rows)
@@ -0,0 +1,130 @@
+"""Cleaning batches run in the background, so a UI can poll them instead of blocking on them."""
+
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from .batch import MAX_CONCURRENT_FILES, FileBatch
+
+# Batches cleaned at the same time; later ones wait their turn in the queue.
+MAX_RUNNING_JOBS = 1
+# Finished jobs nobody collected are dropped this long after finishing.
+JOB_TTL_SECONDS = 3600
+
+QUEUED, RUNNING, DONE, CANCELLED, FAILED = 'queued', 'running', 'done', 'cancelled', 'failed'
+
+class Job:
+    """One submitted batch: its state, per-file progress and, once finished, outcomes.
+
+    files holds (name, source, file_extension, kwargs) tuples; kwargs go to
+    clean_source for that file. outcomes is None until the job has finished,
+    then has one (result, error, exception) per file in submit order.
+    """
+    
+    def __init__(self, files, options, max_files=MAX_CONCURRENT_FILES, **info):
+        self.id = uuid.uuid4().hex[:12]
+        self.files = files
+        self.options = options
+        self.max_files = max_files
+        self.info = info
+        self.state = QUEUED
+        self.error = None
+        self.outcomes = None
+        self.submitted_at = time.time()
+        self.finished_at = None
+        self.batch = None
+        self.cancelled = threading.Event()
+    
+    @property
+    def names(self):
+        return [name for name, _, _, _ in self.files]
+    
+    @property
+    def finished(self):
+        return self.state in (DONE, CANCELLED, FAILED)
+    
+    def run(self):
+        try:
+            if self.cancelled.is_set():
+                self.state = CANCELLED
+                return
+            self.batch = FileBatch(max_files=self.max_files)
+            self.state = RUNNING
+            for _, source, file_extension, kwargs in self.files:
+                self.batch.submit(source, file_extension, self.options, **kwargs)
+            # cancel() may have run before the batch existed.
+            if self.cancelled.is_set():
+                self.batch.cancel()
+            self.outcomes = self.batch.outcomes()
+            self.state = CANCELLED if self.cancelled.is_set() else DONE
+        except Exception as e:
+            self.error = str(e)
+            self.state = FAILED
+        finally:
+            self.finished_at = time.time()
+    
+    def cancel(self):
+        """Skip files not yet started and stop running ones at their next progress report."""
+        self.cancelled.set()
+        if self.batch is not None:
+            self.batch.cancel()
+    
+    def progress(self):
+        """Overall fraction done, finished file count and the fraction done of each file."""
+        if self.batch is None:
+            return (1.0 if self.finished else 0.0), 0, [0.0] * len(self.files)
+        fraction, finished = self.batch.progress()
+        return fraction, finished, self.batch.file_progress()
+
+class JobRunner:
+    """Queue of Jobs run on at most max_running background threads.
+
+    Meant to be shared by every session of a server (e.g. through
+    st.cache_resource): submit() returns a job id at once, and any later
+    script run can look the job up with get() to poll it, cancel it, or
+    pop() it once its outcomes have been taken.
+    """
+    
+    def __init__(self, max_running=MAX_RUNNING_JOBS):
+        self.executor = ThreadPoolExecutor(max_workers=max_running, thread_name_prefix='comment-cleaner-job')
+        self.jobs = {}
+        self.lock = threading.Lock()
+    
+    def submit(self, files, options, max_files=MAX_CONCURRENT_FILES, **info):
+        """Queue files for cleaning and return the job id; info (e.g. platforms) is kept on the job."""
+        self.expire()
+        job = Job(files, options, max_files, **info)
+        with self.lock:
+            self.jobs[job.id] = job
+        self.executor.submit(job.run)
+        return job.id
+    
+    def get(self, job_id):
+        with self.lock:
+            return self.jobs.get(job_id)
+    
+    def pop(self, job_id):
+        with self.lock:
+            return self.jobs.pop(job_id, None)
+    
+    def cancel(self, job_id):
+        job = self.get(job_id)
+        if job is not None:
+            job.cancel()
+    
+    def queue_position(self, job_id):
+        """How many queued jobs were submitted before this one; None unless it is queued."""
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is None or job.state != QUEUED:
+                return None
+            return sum(other.state == QUEUED and other.submitted_at < job.submitted_at
+                       for other in self.jobs.values())
+    
+    def expire(self):
+        cutoff = time.time() - JOB_TTL_SECONDS
+        with self.lock:
+            for job_id in [job_id for job_id, job in self.jobs.items()
+                           if job.finished_at is not None and job.finished_at < cutoff]:
+                del self.jobs[job_id]
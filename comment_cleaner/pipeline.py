@@ -0,0 +1,199 @@
+"""One uploaded or on-disk file in, one result dict out; shared by the UI and the CLI."""
+
+from itertools import chain
+
+import pandas as pd
+
+from .cache import cache_key, hash_source
+from .cleaner import CommentCleaner
+from .incremental import RowStore, options_fingerprint
+from .readers import EXCEL_EXTENSIONS, iter_excel_sheets, read_dataframe, read_sample, stream_clean_csv
+from .timing import stage, timed_chunks
+
+def clean_source(source, file_extension, options, comment_column=None, keep_columns=None,
+                 stream_to=None, cache=None, progress=None, timer=None,
+                 row_store=None, key_column=None):
+    """Read and clean a binary file-like object.
+
+    options holds clean_dataset's keyword arguments. The comment column is
+    found from the first rows alone; keep_columns, if given, limits the
+    output to it plus those columns, and nothing else is ever parsed. With
+    stream_to set, CSVs are cleaned chunk by chunk into that path instead
+    of into memory.
+    progress, if given, is called with the fraction of the file done. Returns
+    (result, error) where result has cleaned_df (or output_path), encoding,
+    stats, removed and preview. With a StageTimer as timer, each stage is
+    timed and the timer is returned as result['timer'].
+    row_store, a SQLite path, turns on incremental cleaning: rows already
+    stored under the same options, known by key_column or else by comment
+    text, are not cleaned again.
+    """
+    if row_store is not None:
+        settings = dict(options, comment_column=comment_column, keep_columns=keep_columns)
+        store = RowStore(row_store, options_fingerprint(settings, key_column=key_column))
+        try:
+            return clean_source(source, file_extension, dict(options, store=store, key_column=key_column),
+                                comment_column, keep_columns, stream_to, cache, progress, timer)
+        finally:
+            store.close()
+    
+    key = None
+    if options.get('deduplicator') is not None:
+        # The result depends on which files came before, not just this one.
+        cache = None
+    if cache is not None:
+        with stage(timer, 'cache') as record:
+            key = cache_key(hash_source(source), file_extension, dict(options, comment_column=comment_column, keep_columns=keep_columns))
+            result = cache.get(key)
+            if result is not None:
+                record['rows_out'] = result['stats']['original_count']
+        if result is not None:
+            if progress is not None:
+                progress(1.0)
+            return dict(result, timer=timer), None
+    
+    cleaner = CommentCleaner(min_char_length=options.get('min_length', 10))
+    if timer is not None:
+        options = dict(options, timer=timer)
+    
+    if file_extension in EXCEL_EXTENSIONS:
+        cleaned_df, output_path, encoding, error = clean_workbook(
+            cleaner, source, file_extension, options, comment_column, keep_columns, progress)
+    else:
+        cleaned_df, output_path, encoding, error = clean_table(
+            cleaner, source, file_extension, options, comment_column, keep_columns, stream_to, progress)
+    if error:
+        return None, error
+    
+    result = {
+        'cleaned_df': cleaned_df,
+        'output_path': output_path,
+        'encoding': encoding,
+        'stats': cleaner.cleaning_stats.copy(),
+        'removed': cleaner.removed_rows.copy(),
+        'preview': cleaner.preview_data
+    }
+    if cache is not None:
+        cache.put(key, result)
+    result['timer'] = timer
+    return result, None
+
+def projected_columns(names, comment_column, keep_columns, options):
+    if keep_columns is None:
+        return None
+    wanted = {comment_column, options.get('key_column'), *keep_columns}
+    return [name for name in names if name in wanted]
+
+def clean_table(cleaner, source, file_extension, options, comment_column, keep_columns, stream_to, progress):
+    """CSV and columnar files. Returns (cleaned_df, output_path, encoding, error)."""
+    timer = options.get('timer')
+    with stage(timer, 'sample') as record:
+        sample = read_sample(source, file_extension)
+        record['rows_out'] = None if sample is None else len(sample)
+    if sample is None:
+        return None, None, None, f"Unsupported file type: .{file_extension}"
+    if comment_column is None:
+        comment_column = cleaner.detect_comment_column(sample)
+        if comment_column is None:
+            return None, None, None, "Could not detect comment column. Available columns: " + ", ".join(map(str, sample.columns))
+    elif comment_column not in sample.columns:
+        return None, None, None, f"Column '{comment_column}' not found in dataset"
+    columns = projected_columns(sample.columns, comment_column, keep_columns, options)
+    
+    if file_extension == 'csv' and stream_to:
+        if progress is not None:
+            # Rows ahead are unknown while streaming, so go by bytes consumed.
+            size = source.seek(0, 2) or 1
+            source.seek(0)
+            options = dict(options, progress=lambda rows: progress(min(source.tell() / size, 1.0)))
+        error, encoding = stream_clean_csv(cleaner, source, stream_to, comment_column=comment_column,
+                                           columns=columns, **options)
+        return None, stream_to, encoding, error
+    
+    with stage(timer, 'read') as record:
+        df, encoding = read_dataframe(source, file_extension, columns, text_columns=[comment_column])
+        record['rows_out'] = len(df)
+    
+    if progress is not None:
+        rows_done = [0]
+        def on_rows(rows):
+            rows_done[0] += rows
+            progress(rows_done[0] / max(len(df), 1))
+        options = dict(options, progress=on_rows)
+    
+    cleaned_df, error = cleaner.clean_dataset(df, comment_column=comment_column, **options)
+    return cleaned_df, None, encoding, error
+
+def clean_workbook(cleaner, source, file_extension, options, comment_column, keep_columns, progress):
+    """Every worksheet with a comment column, streamed in chunks. Returns (cleaned_df, output_path, encoding, error).
+
+    With more than one such sheet the rows are stacked under the first
+    sheet's comment column name, with a leading 'sheet' column saying where
+    each came from (underscores are prefixed while a sheet already has one).
+    """
+    timer = options.get('timer')
+    sheets = []
+    cleaned = []
+    
+    def frames():
+        workbook = iter_excel_sheets(source, file_extension)
+        total_rows = rows_done = 0
+        while True:
+            with stage(timer, 'open_sheet'):
+                sheet = next(workbook, None)
+            if sheet is None:
+                return
+            name, rows, chunks = sheet
+            chunks = timed_chunks(timer, 'read', chunks)
+            first = next(chunks, None)
+            if first is None:
+                continue
+            column = comment_column
+            if column is None:
+                column = cleaner.detect_comment_column(first)
+            if column is None or column not in first.columns:
+                continue
+            sheets.append((name, column))
+            columns = projected_columns(first.columns, column, keep_columns, options)
+            total_rows += rows or len(first)
+            for chunk in chain([first], chunks):
+                if progress is not None:
+                    # Later sheets' sizes aren't known until they are opened.
+                    rows_done += len(chunk)
+                    progress(min(rows_done / total_rows, 1.0))
+                yield column, chunk if columns is None else chunk[columns]
+    
+    def write(cleaned_chunk, chunk_idx):
+        cleaned.append((sheets[-1][0], cleaned_chunk))
+    
+    error = cleaner.clean_frames(frames(), write, **options)
+    if error:
+        return None, None, None, error
+    if not sheets:
+        if comment_column is not None:
+            return None, None, None, f"Column '{comment_column}' not found in any sheet"
+        return None, None, None, "Could not detect comment column in any sheet"
+    
+    if len(sheets) == 1:
+        return pd.concat([chunk for _, chunk in cleaned]), None, None, None
+    
+    # Detection can pick differently named columns ('comment', 'Message') on different sheets.
+    shared_column = sheets[0][1]
+    comment_columns = dict(sheets)
+    sheet_columns = {}
+    for name, chunk in cleaned:
+        sheet_columns.setdefault(name, set(chunk.columns))
+    for name, columns in sheet_columns.items():
+        if comment_columns[name] != shared_column and shared_column in columns:
+            return None, None, None, (f"Sheet '{name}' has a '{shared_column}' column besides its comment "
+                                      f"column '{comment_columns[name]}'")
+    sheet_column = 'sheet'
+    while any(sheet_column in columns for columns in sheet_columns.values()):
+        sheet_column = '_' + sheet_column
+    
+    cleaned_df = pd.concat([
+        chunk.rename(columns={comment_columns[name]: shared_column}).assign(**{sheet_column: name})
+        for name, chunk in cleaned
+    ], ignore_index=True)
+    cleaned_df.insert(0, sheet_column, cleaned_df.pop(sheet_column))
+    return cleaned_df, None, None, None
@@ -0,0 +1,278 @@
+import codecs
+import io
+from datetime import date, datetime
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = feather = pq = None
+
+try:
+    # Rust workbook reader, much faster than openpyxl; optional.
+    import python_calamine
+except ImportError:
+    python_calamine = None
+
+# Columnar formats read through pyarrow; .arrow may be the IPC file or stream format.
+ARROW_EXTENSIONS = ['parquet', 'feather', 'arrow']
+EXCEL_EXTENSIONS = ['xlsx', 'xls']
+SUPPORTED_EXTENSIONS = ['csv'] + EXCEL_EXTENSIONS + ARROW_EXTENSIONS
+
+# Rows per DataFrame built from a worksheet.
+EXCEL_CHUNK_ROWS = 50000
+
+# Longest-first, so a UTF-32 BOM isn't mistaken for UTF-16.
+BOMS = [
+    (codecs.BOM_UTF32_LE, 'utf-32'), (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'), (codecs.BOM_UTF16_BE, 'utf-16'),
+]
+
+# Bytes inspected when guessing a CSV's encoding.
+SNIFF_BYTES = 64 * 1024
+
+# Rows read up front to find the comment column before the full load.
+SAMPLE_ROWS = 200
+
+# Comment text is loaded as Arrow-backed strings when pyarrow is there.
+TEXT_DTYPE = pd.StringDtype('pyarrow') if pa is not None else object
+
+def get_extension(filename):
+    return filename.lower().split('.')[-1]
+
+def detect_encoding(prefix):
+    """Guess the encoding of a CSV from its first bytes: a BOM, else utf-8 if it decodes, else latin-1."""
+    for bom, encoding in BOMS:
+        if prefix.startswith(bom):
+            return encoding
+    try:
+        # final=False tolerates a multi-byte char cut off at the end of the prefix.
+        codecs.getincrementaldecoder('utf-8')().decode(prefix, final=False)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        return 'latin-1'
+
+def read_csv_bytes(data, encoding=None, **read_options):
+    """Parse CSV bytes once. Returns (df, encoding); read_options go to pd.read_csv."""
+    if encoding is None:
+        encoding = detect_encoding(data[:SNIFF_BYTES])
+    try:
+        # BytesIO over bytes shares the buffer instead of copying it.
+        return pd.read_csv(io.BytesIO(data), encoding=encoding, **read_options), encoding
+    except UnicodeDecodeError:
+        # Decoded cleanly in the sniffed prefix but not beyond it.
+        return pd.read_csv(io.BytesIO(data), encoding='latin-1', **read_options), 'latin-1'
+
+def string_types_mapper(arrow_type):
+    # Keep text in Arrow memory as string[pyarrow] instead of Python objects.
+    if pa.types.is_string(arrow_type) or pa.types.is_large_string(arrow_type):
+        return pd.StringDtype('pyarrow')
+    return None
+
+def arrow_buffer(source, file_extension):
+    """A file-like's bytes as a pyarrow Buffer; in-memory uploads are wrapped without a copy."""
+    if pa is None:
+        raise ImportError(f"Reading .{file_extension} files requires pyarrow")
+    if hasattr(source, 'getbuffer'):
+        return pa.py_buffer(source.getbuffer())
+    return pa.py_buffer(source.read())
+
+def open_arrow_table(data, file_extension, columns=None):
+    if pa is None:
+        raise ImportError(f"Reading .{file_extension} files requires pyarrow")
+    if file_extension == 'parquet':
+        return pq.read_table(pa.BufferReader(data), columns=columns)
+    try:
+        return feather.read_table(pa.BufferReader(data), columns=columns)
+    except pa.ArrowInvalid:
+        table = pa.ipc.open_stream(pa.BufferReader(data)).read_all()
+        return table.select(columns) if columns is not None else table
+
+def read_sample(source, file_extension, rows=SAMPLE_ROWS):
+    """The header and first rows of a file, without parsing the rest; rewinds source.
+
+    Returns None for an unsupported file type.
+    """
+    try:
+        if file_extension == 'csv':
+            prefix = source.read(SNIFF_BYTES)
+            source.seek(0)
+            try:
+                return pd.read_csv(source, encoding=detect_encoding(prefix), nrows=rows)
+            except UnicodeDecodeError:
+                source.seek(0)
+                return pd.read_csv(source, encoding='latin-1', nrows=rows)
+        if file_extension in EXCEL_EXTENSIONS:
+            workbook = iter_excel_sheets(source, file_extension, chunk_rows=rows)
+            try:
+                # The first sheet with any rows.
+                for _, _, chunks in workbook:
+                    chunk = next(chunks, None)
+                    if chunk is not None:
+                        return chunk.head(rows)
+                return pd.DataFrame()
+            finally:
+                workbook.close()
+        if file_extension in ARROW_EXTENSIONS:
+            return read_arrow_sample(arrow_buffer(source, file_extension), file_extension, rows)
+        return None
+    finally:
+        source.seek(0)
+
+def read_arrow_sample(data, file_extension, rows):
+    if pa is None:
+        raise ImportError(f"Reading .{file_extension} files requires pyarrow")
+    if file_extension == 'parquet':
+        parquet_file = pq.ParquetFile(pa.BufferReader(data))
+        batch = next(parquet_file.iter_batches(batch_size=rows), None)
+        table = pa.Table.from_batches([batch]) if batch is not None else parquet_file.schema_arrow.empty_table()
+    else:
+        try:
+            reader = pa.ipc.open_file(pa.BufferReader(data))
+            batches = [reader.get_batch(0)] if reader.num_record_batches else []
+        except pa.ArrowInvalid:
+            reader = pa.ipc.open_stream(pa.BufferReader(data))
+            batches = [batch for batch in [next(iter(reader), None)] if batch is not None]
+        table = pa.Table.from_batches(batches, schema=reader.schema).slice(0, rows)
+    return table.to_pandas(types_mapper=string_types_mapper)
+
+def excel_header(cells, empty=None):
+    # Named the way pd.read_excel names them: blanks become "Unnamed: i", repeats get ".1", ".2", ...
+    names = []
+    seen = {}
+    for idx, cell in enumerate(cells):
+        name = f"Unnamed: {idx}" if cell is None or cell == empty else cell
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        names.append(name)
+    return names
+
+def sheet_chunks(rows, chunk_rows=EXCEL_CHUNK_ROWS, empty=None):
+    """DataFrames of chunk_rows rows from a worksheet's row tuples; the first row is the header.
+
+    empty is how the reader returns a blank cell; those become missing
+    values. Trailing blank rows are dropped, as pd.read_excel does.
+    """
+    rows = iter(rows)
+    header = next(rows, None)
+    if header is None:
+        return
+    columns = excel_header(header, empty)
+    width = len(columns)
+    start = 0
+    batch = []
+    blank = []
+    for row in rows:
+        if row.count(empty) == len(row):
+            # Held back until a later row shows it isn't trailing.
+            blank.append(row)
+            continue
+        if blank:
+            batch += blank
+            blank = []
+        batch.append(row[:width])
+        if len(batch) >= chunk_rows:
+            yield sheet_frame(batch, columns, start, empty)
+            start += len(batch)
+            batch = []
+    if batch:
+        yield sheet_frame(batch, columns, start, empty)
+
+def sheet_frame(batch, columns, start, empty):
+    df = pd.DataFrame(batch, columns=columns, index=pd.RangeIndex(start, start + len(batch)))
+    if empty is None:
+        return df
+    # calamine returns '' for blank cells, floats for all numbers and dates
+    # for midnight datetimes; convert them back as pandas' calamine engine does.
+    for idx in range(len(df.columns)):
+        values = df.iloc[:, idx]
+        if pd.api.types.is_float_dtype(values):
+            if values.notna().all() and (values % 1 == 0).all():
+                df.isetitem(idx, values.astype('int64'))
+        elif not pd.api.types.is_numeric_dtype(values):
+            values = values.mask(values == empty)
+            kind = pd.api.types.infer_dtype(values, skipna=True)
+            if kind in ('date', 'datetime') or kind == 'mixed' and values.dropna().map(
+                    lambda value: isinstance(value, (date, datetime))).all():
+                values = pd.to_datetime(values)
+            df.isetitem(idx, values.infer_objects())
+    return df
+
+def iter_excel_sheets(source, file_extension, chunk_rows=EXCEL_CHUNK_ROWS):
+    """(sheet name, row count or None, DataFrame chunks) for each worksheet, streamed.
+
+    Reads with python-calamine when installed, else openpyxl in read-only
+    mode; neither builds the workbook's object model. .xls without
+    calamine falls back to pd.read_excel, one whole sheet at a time.
+    """
+    if python_calamine is not None:
+        workbook = python_calamine.CalamineWorkbook.from_filelike(source)
+        try:
+            for name in workbook.sheet_names:
+                sheet = workbook.get_sheet_by_name(name)
+                yield name, max(sheet.height - 1, 0), sheet_chunks(sheet.iter_rows(), chunk_rows, empty='')
+        finally:
+            workbook.close()
+    elif file_extension == 'xlsx':
+        import openpyxl
+        
+        workbook = openpyxl.load_workbook(source, read_only=True, data_only=True)
+        try:
+            for sheet in workbook.worksheets:
+                rows = sheet.max_row - 1 if sheet.max_row else None
+                yield sheet.title, rows, sheet_chunks(sheet.iter_rows(values_only=True), chunk_rows)
+        finally:
+            workbook.close()
+    else:
+        for name, df in pd.read_excel(source, sheet_name=None).items():
+            yield name, len(df), iter([df])
+
+def read_dataframe(source, file_extension, columns=None, text_columns=()):
+    """Read a CSV, Parquet or Feather upload. Returns (df, encoding); encoding is None except for CSV.
+
+    columns, if given, lists the columns to load; the others are never
+    parsed or decoded. text_columns are read as TEXT_DTYPE strings.
+    Workbooks are read sheet by sheet through iter_excel_sheets instead.
+    """
+    dtype = {name: TEXT_DTYPE for name in text_columns} or None
+    if file_extension == 'csv':
+        return read_csv_bytes(source.read(), usecols=columns, dtype=dtype)
+    elif file_extension in ARROW_EXTENSIONS:
+        table = open_arrow_table(arrow_buffer(source, file_extension), file_extension, columns)
+        return table.to_pandas(types_mapper=string_types_mapper), None
+    return None, None
+
+def detect_stream_encoding(source, block_size=1 << 20):
+    """detect_encoding, checked against the whole of a file-like a block at a time; rewinds it.
+
+    Falls back to latin-1 if the guess fails anywhere past the sniffed prefix.
+    """
+    encoding = detect_encoding(source.read(SNIFF_BYTES))
+    source.seek(0)
+    if encoding == 'latin-1':
+        return encoding
+    decoder = codecs.getincrementaldecoder(encoding)()
+    try:
+        for block in iter(lambda: source.read(block_size), b''):
+            decoder.decode(block)
+        decoder.decode(b'', final=True)
+    except UnicodeDecodeError:
+        encoding = 'latin-1'
+    source.seek(0)
+    return encoding
+
+def stream_clean_csv(cleaner, source, destination, **options):
+    """cleaner.clean_csv_stream with a detected encoding. Returns (error, encoding).
+
+    The encoding is settled before cleaning starts: a retry after a decode
+    error would feed a shared deduplicator, timer or row store twice.
+    """
+    encoding = detect_stream_encoding(source)
+    return cleaner.clean_csv_stream(source, destination, encoding=encoding, **options), encoding
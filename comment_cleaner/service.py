@@ -0,0 +1,375 @@
+"""Local HTTP cleaning service: python -m comment_cleaner.service [--port PORT]
+
+POST /clean takes a JSON array or NDJSON (one value per line) of comments
+or of row objects, with the sidebar's options as query parameters, e.g.
+/clean?min_length=5&remove_mention=true, and answers with the kept rows,
+the cleaning stats and the removal counts. GET /stats reports throughput
+and latency; GET /health answers once the cleaner is warm.
+"""
+
+import argparse
+import json
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+import pandas as pd
+
+from .cleaner import CommentCleaner
+
+logger = logging.getLogger('comment_cleaner.service')
+
+DEFAULT_PORT = 8765
+# How long the first request of a batch waits for others to join it.
+MAX_WAIT_SECONDS = 0.01
+# A batch is cleaned as soon as it holds this many rows.
+MAX_BATCH_ROWS = 50000
+# Larger bodies are refused with 413.
+MAX_BODY_BYTES = 64 * 1024 * 1024
+# Requests and batches kept for the latency and throughput figures.
+STATS_WINDOW = 1000
+
+# Query parameter -> (clean_dataset option, parser, default); defaults match the sidebar.
+OPTIONS = {
+    'column': ('comment_column', str, None),
+    'remove_emoji': ('remove_emoji', 'bool', True),
+    'remove_url': ('remove_url', 'bool', True),
+    'remove_mention': ('remove_mention', 'bool', False),
+    'remove_hashtag': ('remove_hashtag', 'bool', False),
+    'min_length': ('min_length', int, 10),
+    'remove_duplicates': ('remove_duplicates', 'bool', False),
+    'near_duplicates': ('near_duplicate_threshold', float, None),
+    'metrics': ('metrics', 'bool', False),
+}
+
+# Options that change how a single comment is cleaned; requests agreeing on them share a batch.
+BATCH_OPTIONS = ['min_length', 'remove_emoji', 'remove_url', 'remove_mention', 'remove_hashtag']
+
+def parse_bool(value):
+    lowered = value.lower()
+    if lowered in ('1', 'true', 'yes', 'on'):
+        return True
+    if lowered in ('0', 'false', 'no', 'off'):
+        return False
+    raise ValueError(f"expected true or false, got {value!r}")
+
+def parse_options(query):
+    """clean_dataset options from a query string; unknown or malformed parameters raise ValueError."""
+    options = {name: default for name, _, default in OPTIONS.values()}
+    for param, values in parse_qs(query, keep_blank_values=True).items():
+        if param not in OPTIONS:
+            raise ValueError(f"Unknown option '{param}'. Options: " + ", ".join(OPTIONS))
+        name, parser, _ = OPTIONS[param]
+        try:
+            options[name] = parse_bool(values[-1]) if parser == 'bool' else parser(values[-1])
+        except ValueError as e:
+            raise ValueError(f"Bad value for '{param}': {e}") from None
+    return options
+
+def parse_rows(body, content_type=''):
+    """A DataFrame from a JSON array or NDJSON body of strings (a 'comment' column) or row objects."""
+    text = body.decode('utf-8-sig')
+    if 'ndjson' in content_type or 'jsonl' in content_type:
+        values = [json.loads(line) for line in text.splitlines() if line.strip()]
+    else:
+        values = json.loads(text)
+        if not isinstance(values, list):
+            raise ValueError("Expected a JSON array (or NDJSON with Content-Type: application/x-ndjson)")
+    if not values:
+        return pd.DataFrame({'comment': pd.Series([], dtype=object)})
+    if all(isinstance(value, dict) for value in values):
+        return pd.DataFrame.from_records(values)
+    if any(isinstance(value, (dict, list)) for value in values):
+        raise ValueError("Expected every value to be a comment or every value to be a row object")
+    return pd.DataFrame({'comment': pd.Series(values, dtype=object)})
+
+class Request:
+    """One /clean call waiting in the batcher; its future gets (df_cleaned, error, stats, removed)."""
+    
+    def __init__(self, df, options):
+        self.df = df
+        self.options = options
+        self.future = Future()
+        self.arrived = time.perf_counter()
+    
+    @property
+    def batch_key(self):
+        return tuple(self.options[name] for name in BATCH_OPTIONS)
+
+class ServiceStats:
+    """Request and batch counters, with latency percentiles over the last STATS_WINDOW requests."""
+    
+    def __init__(self):
+        self.started = time.time()
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.rows = 0
+        self.batches = 0
+        self.latencies = deque(maxlen=STATS_WINDOW)
+        self.recent = deque(maxlen=STATS_WINDOW)
+        self.batch_sizes = deque(maxlen=STATS_WINDOW)
+    
+    def add_request(self, rows, seconds, error=False):
+        with self.lock:
+            self.requests += 1
+            self.errors += error
+            self.rows += rows
+            self.latencies.append(seconds)
+            self.recent.append((time.time(), rows))
+    
+    def add_batch(self, requests, rows, seconds):
+        with self.lock:
+            self.batches += 1
+            self.batch_sizes.append((requests, rows, seconds))
+    
+    def report(self):
+        with self.lock:
+            uptime = time.time() - self.started
+            latencies = np.array(self.latencies) * 1000
+            recent = list(self.recent)
+            batch_sizes = np.array(self.batch_sizes).reshape(-1, 3)
+            report = dict(
+                uptime_seconds=round(uptime, 3), requests=self.requests, errors=self.errors,
+                rows=self.rows, batches=self.batches,
+                rows_per_sec=round(self.rows / uptime, 1) if uptime else None,
+            )
+        # Throughput over the window, from its first request to now.
+        span = time.time() - recent[0][0] if recent else 0
+        report['recent_rows_per_sec'] = round(sum(rows for _, rows in recent) / span, 1) if span else None
+        report['latency_ms'] = {
+            name: round(float(np.percentile(latencies, q)), 3) if len(latencies) else None
+            for name, q in [('p50', 50), ('p95', 95), ('p99', 99), ('max', 100)]
+        }
+        report['batch'] = {
+            'mean_requests': round(float(batch_sizes[:, 0].mean()), 2) if len(batch_sizes) else None,
+            'mean_rows': round(float(batch_sizes[:, 1].mean()), 1) if len(batch_sizes) else None,
+            'mean_clean_ms': round(float(batch_sizes[:, 2].mean()) * 1000, 3) if len(batch_sizes) else None,
+        }
+        return report
+
+class MicroBatcher:
+    """Coalesces concurrent requests into one clean_column call per batch.
+
+    A single thread takes the oldest request, waits up to max_wait seconds
+    from its arrival for more (or until max_batch_rows rows are queued),
+    then cleans every request that shares its per-comment options as one
+    column. Each request is then finished on its own by clean_dataset, so
+    column detection, duplicates and stats behave as for a file. Cleaners
+    are kept warm per min_length and only ever used from this thread.
+    """
+    
+    def __init__(self, max_wait=MAX_WAIT_SECONDS, max_batch_rows=MAX_BATCH_ROWS, stats=None, blocklist=None):
+        self.max_wait = max_wait
+        self.max_batch_rows = max_batch_rows
+        self.blocklist = blocklist
+        self.stats = stats if stats is not None else ServiceStats()
+        self.queue = queue.Queue()
+        self.cleaners = {}
+        self.warm(OPTIONS['min_length'][2])
+        self.thread = threading.Thread(target=self.run, name='comment-cleaner-batcher', daemon=True)
+        self.thread.start()
+    
+    def warm(self, min_length):
+        """The cleaner for min_length, built and run once on a sample so the first request pays nothing extra."""
+        if min_length not in self.cleaners:
+            cleaner = CommentCleaner(min_char_length=min_length)
+            cleaner.clean_column(pd.Series(['Warm up 👋 https://example.com @user #tag', '好评', '']))
+            self.cleaners[min_length] = cleaner
+        return self.cleaners[min_length]
+    
+    def submit(self, df, options):
+        request = Request(df, options)
+        self.queue.put(request)
+        return request.future
+    
+    def close(self):
+        self.queue.put(None)
+        self.thread.join()
+    
+    def run(self):
+        while True:
+            first = self.queue.get()
+            if first is None:
+                return
+            batch = [first]
+            rows = len(first.df)
+            deadline = first.arrived + self.max_wait
+            while rows < self.max_batch_rows:
+                try:
+                    request = self.queue.get(timeout=max(deadline - time.perf_counter(), 0))
+                except queue.Empty:
+                    break
+                if request is None:
+                    self.queue.put(None)
+                    break
+                batch.append(request)
+                rows += len(request.df)
+            
+            groups = {}
+            for request in batch:
+                groups.setdefault(request.batch_key, []).append(request)
+            for requests in groups.values():
+                try:
+                    self.clean_batch(requests)
+                except Exception as e:
+                    for request in requests:
+                        if not request.future.done():
+                            request.future.set_exception(e)
+    
+    def clean_batch(self, requests):
+        start = time.perf_counter()
+        options = requests[0].options
+        cleaner = self.warm(options['min_length'])
+        
+        ready = []
+        for request in requests:
+            comment_column = request.options['comment_column']
+            if comment_column is None:
+                comment_column = cleaner.detect_comment_column(request.df)
+            if comment_column is None or comment_column not in request.df.columns:
+                # Let clean_dataset word the error exactly as it does for files.
+                request.future.set_result(cleaner.clean_dataset(request.df, comment_column) + (None, None))
+                continue
+            ready.append((request, comment_column))
+        if not ready:
+            return
+        
+        comments = pd.concat([request.df[column].astype(object) for request, column in ready], ignore_index=True)
+        reasons = []
+        keep, cleaned_comments, scripts, _ = cleaner.clean_column(
+            comments, options['remove_emoji'], options['remove_url'],
+            options['remove_mention'], options['remove_hashtag'], reasons=reasons, blocklist=self.blocklist
+        )
+        
+        row_start = kept_start = 0
+        for request, comment_column in ready:
+            row_end = row_start + len(request.df)
+            request_keep = keep[row_start:row_end].copy()
+            kept_end = kept_start + int(request_keep.sum())
+            removed = dict.fromkeys(cleaner.removed_rows, 0)
+            for reason in reasons[row_start:row_end]:
+                if reason in removed:
+                    removed[reason] += 1
+            try:
+                df_cleaned, error = cleaner.clean_dataset(
+                    request.df, comment_column, min_length=request.options['min_length'],
+                    remove_duplicates=request.options['remove_duplicates'],
+                    near_duplicate_threshold=request.options['near_duplicate_threshold'],
+                    metrics=request.options['metrics'],
+                    column_result=(request_keep, cleaned_comments[kept_start:kept_end],
+                                   scripts[kept_start:kept_end], removed)
+                )
+                request.future.set_result((df_cleaned, error, dict(cleaner.cleaning_stats), dict(cleaner.removed_rows)))
+            except Exception as e:
+                request.future.set_exception(e)
+            row_start, kept_start = row_end, kept_end
+        
+        self.stats.add_batch(len(requests), len(comments), time.perf_counter() - start)
+
+class CleaningHandler(BaseHTTPRequestHandler):
+    server_version = 'comment-cleaner'
+    
+    def do_GET(self):
+        path = urlsplit(self.path).path
+        if path == '/health':
+            self.send_json(200, {'status': 'ok'})
+        elif path == '/stats':
+            self.send_json(200, self.server.batcher.stats.report())
+        else:
+            self.send_json(404, {'error': f"Not found: {path}"})
+    
+    def do_POST(self):
+        start = time.perf_counter()
+        url = urlsplit(self.path)
+        if url.path != '/clean':
+            self.send_json(404, {'error': f"Not found: {url.path}"})
+            return
+        
+        length = int(self.headers.get('Content-Length') or 0)
+        if length > MAX_BODY_BYTES:
+            self.send_json(413, {'error': f"Body over {MAX_BODY_BYTES} bytes"})
+            return
+        try:
+            options = parse_options(url.query)
+            df = parse_rows(self.rfile.read(length), self.headers.get('Content-Type', ''))
+        except ValueError as e:
+            # json.JSONDecodeError is a ValueError too.
+            self.send_json(400, {'error': str(e)})
+            self.server.batcher.stats.add_request(0, time.perf_counter() - start, error=True)
+            return
+        
+        try:
+            df_cleaned, error, stats, removed = self.server.batcher.submit(df, options).result()
+        except Exception as e:
+            df_cleaned, error = None, str(e)
+        if error:
+            self.send_json(422, {'error': error})
+        else:
+            # to_json turns NaN into null and timestamps into ISO strings, which json.dumps won't.
+            rows = df_cleaned.to_json(orient='records', force_ascii=False, date_format='iso')
+            body = '{"rows": %s, "stats": %s, "removed": %s}' % (
+                rows, json.dumps(stats, ensure_ascii=False), json.dumps(removed))
+            self.send_body(200, body.encode('utf-8'))
+        self.server.batcher.stats.add_request(len(df), time.perf_counter() - start, error=bool(error))
+    
+    def send_json(self, status, payload):
+        self.send_body(status, json.dumps(payload, ensure_ascii=False).encode('utf-8'))
+    
+    def send_body(self, status, body):
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, format, *args):
+        # Request lines go through logging rather than straight to stderr.
+        logger.debug(format, *args)
+
+def make_server(host='127.0.0.1', port=DEFAULT_PORT, max_wait=MAX_WAIT_SECONDS, max_batch_rows=MAX_BATCH_ROWS,
+                blocklist=None):
+    """A ThreadingHTTPServer with a warm MicroBatcher; port 0 picks a free port (see server.server_address)."""
+    server = ThreadingHTTPServer((host, port), CleaningHandler)
+    server.daemon_threads = True
+    server.batcher = MicroBatcher(max_wait, max_batch_rows, blocklist=blocklist)
+    return server
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='comment_cleaner.service', description='Serve comment cleaning over local HTTP.')
+    parser.add_argument('--host', default='127.0.0.1', help='Address to bind (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=f"Port to listen on (default: {DEFAULT_PORT})")
+    parser.add_argument('--max-wait-ms', type=float, default=MAX_WAIT_SECONDS * 1000,
+                        help='Latency budget a request may wait for others to batch with (default: %(default)s)')
+    parser.add_argument('--max-batch-rows', type=int, default=MAX_BATCH_ROWS,
+                        help='Clean a batch at once when it reaches this many rows (default: %(default)s)')
+    parser.add_argument('--blocklist', action='append', metavar='FILE',
+                        help='Phrase file applied to every request, one phrase per line (repeatable)')
+    parser.add_argument('--blocklist-action', choices=['drop', 'mask'], default='drop',
+                        help='Drop blocklisted comments or mask the matched phrases (default: drop)')
+    args = parser.parse_args(argv)
+    
+    blocklist = None
+    if args.blocklist:
+        from .blocklist import Blocklist
+        blocklist = Blocklist.from_files(args.blocklist, args.blocklist_action)
+    server = make_server(args.host, args.port, args.max_wait_ms / 1000, args.max_batch_rows, blocklist)
+    host, port = server.server_address[:2]
+    print(f"Serving on http://{host}:{port} (POST /clean, GET /stats)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.batcher.close()
+    return 0
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,82 @@
+"""Opt-in per-stage timing of reading, cleaning and exporting a file."""
+
+import json
+import logging
+import time
+from contextlib import contextmanager, nullcontext
+
+logger = logging.getLogger('comment_cleaner.timing')
+
+class StageTimer:
+    """Wall time and rows in/out per named stage of one file.
+
+    A stage entered more than once (e.g. once per streamed chunk) adds up
+    under its name; stages are reported in the order first seen.
+    """
+    
+    def __init__(self):
+        self.stages = {}
+    
+    @contextmanager
+    def stage(self, name, rows_in=None):
+        # The caller may fill in rows_in/rows_out on the yielded record.
+        record = {'rows_in': rows_in, 'rows_out': None}
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            self.add(name, time.perf_counter() - start, record['rows_in'], record['rows_out'])
+    
+    def add(self, name, seconds, rows_in=None, rows_out=None):
+        totals = self.stages.setdefault(name, {'calls': 0, 'seconds': 0.0, 'rows_in': None, 'rows_out': None})
+        totals['calls'] += 1
+        totals['seconds'] += seconds
+        for key, rows in [('rows_in', rows_in), ('rows_out', rows_out)]:
+            if rows is not None:
+                totals[key] = (totals[key] or 0) + int(rows)
+    
+    def records(self):
+        """One dict per stage: stage, calls, seconds, rows_in, rows_out, rows_per_sec."""
+        records = []
+        for name, totals in self.stages.items():
+            rows = totals['rows_in'] if totals['rows_in'] is not None else totals['rows_out']
+            records.append(dict(
+                stage=name, calls=totals['calls'], seconds=round(totals['seconds'], 6),
+                rows_in=totals['rows_in'], rows_out=totals['rows_out'],
+                rows_per_sec=round(rows / totals['seconds'], 1) if rows is not None and totals['seconds'] else None
+            ))
+        return records
+    
+    def report(self, **context):
+        """The timings as one JSON-serializable record, with context (e.g. file=...) merged in."""
+        stages = self.records()
+        return dict(context, total_seconds=round(sum(stage['seconds'] for stage in stages), 6), stages=stages)
+    
+    def to_json(self, **context):
+        return json.dumps(self.report(**context), ensure_ascii=False)
+    
+    def log(self, level=logging.INFO, **context):
+        """Emit the report as a structured log record; it is also in the record's 'timings' attribute."""
+        if logger.isEnabledFor(level):
+            report = self.report(**context)
+            logger.log(level, json.dumps(report, ensure_ascii=False), extra={'timings': report})
+
+def stage(timer, name, rows_in=None):
+    """timer.stage(name, rows_in), or a no-op when timing is off (timer is None)."""
+    if timer is None:
+        return nullcontext({})
+    return timer.stage(name, rows_in)
+
+def timed_chunks(timer, name, chunks):
+    """Iterate over chunks, timing the production of each as stage name."""
+    if timer is None:
+        yield from chunks
+        return
+    chunks = iter(chunks)
+    while True:
+        with timer.stage(name) as record:
+            chunk = next(chunks, None)
+            record['rows_out'] = 0 if chunk is None else len(chunk)
+        if chunk is None:
+            return
+        yield chunk
@@ -0,0 +1,61 @@
+import unicodedata
+
+import pytest
+
+from comment_cleaner.blocklist import Blocklist
+
+def test_phrase_inside_a_word_is_not_matched():
+    blocklist = Blocklist(['ass'])
+    assert not blocklist.search('first class')
+    assert not blocklist.search('assorted')
+    assert blocklist.search('you ass!')
+    assert blocklist.search('ass')
+
+def test_phrase_inside_a_word_is_matched_without_whole_words():
+    assert Blocklist(['ass'], whole_words=False).search('first class')
+
+def test_multi_word_phrase_needs_boundaries_at_both_ends():
+    blocklist = Blocklist(['bad  word'])
+    assert blocklist.search('what a bad word.')
+    assert not blocklist.search('bad wordy')
+    assert not blocklist.search('a badword')
+
+def test_unspaced_scripts_match_anywhere():
+    assert Blocklist(['ที่']).search('อยู่ที่นี่')
+
+def test_overlapping_phrases_are_all_found():
+    blocklist = Blocklist(['he', 'she', 'hers'], whole_words=False)
+    assert sorted(blocklist.matches('ushers')) == [(1, 4), (2, 4), (2, 6)]
+    assert blocklist.mask('ushers') == 'u*****'
+
+def test_case_and_compatibility_forms_are_folded():
+    blocklist = Blocklist(['Spam', 'café'])
+    assert blocklist.search('SPAM')
+    assert blocklist.search('ＳＰＡＭ')
+    assert blocklist.search(unicodedata.normalize('NFD', 'CAFÉ'))
+    assert not blocklist.search('cafe')
+
+def test_zero_width_characters_do_not_split_a_phrase():
+    assert Blocklist(['spam']).search('sp\u200bam')
+
+def test_mask_replaces_only_matched_characters():
+    blocklist = Blocklist(['ass', 'spam'], action='mask')
+    assert blocklist.mask('you ASS, stop the spam!') == 'you ***, stop the ****!'
+    assert blocklist.mask('first class') == 'first class'
+
+def test_mask_maps_folded_spans_back_to_the_original_text():
+    blocklist = Blocklist(['café'], action='mask')
+    decomposed = unicodedata.normalize('NFD', 'café')
+    assert blocklist.mask('ＣＡＦＥ\u0301 ok') == '***** ok'
+    assert blocklist.mask(decomposed + '!') == '*' * len(decomposed) + '!'
+
+def test_fingerprint_follows_phrases_and_settings():
+    blocklist = Blocklist(['spam', 'Spam '])
+    assert len(blocklist) == 1
+    assert blocklist.fingerprint == Blocklist(['SPAM']).fingerprint
+    assert blocklist.fingerprint != Blocklist(['spam'], action='mask').fingerprint
+    assert blocklist.fingerprint != Blocklist(['spam'], whole_words=False).fingerprint
+
+def test_unknown_action_is_rejected():
+    with pytest.raises(ValueError):
+        Blocklist(['spam'], action='hide')
@@ -0,0 +1,89 @@
+import itertools
+import random
+import re
+
+import emoji
+import pandas as pd
+import pytest
+
+from comment_cleaner.cleaner import (
+    HASHTAG_REGEX, MENTION_REGEX, SPECIAL_CHARS_REGEX, URL_REGEX, WHITESPACE_REGEX, WWW_REGEX, CommentCleaner
+)
+
+FRAGMENTS = ['http://', 'https://', 'www.', '.co', '.com', '@', '#', '/', '%2F', 'ab', 'x', '_', '1',
+             'é', 'à', 'مرحبا', '中文', 'ไทย', 'नमस्ते', '한국', '!!!', '...', '?', ' ', '  ', '\n', '\t']
+OPTIONS = list(itertools.product([True, False], repeat=3))
+
+def baseline_transform(text, remove_url, remove_mention, remove_hashtag):
+    """The original one-rule-at-a-time transform."""
+    if remove_url:
+        text = re.sub(URL_REGEX, '', text)
+        text = re.sub(WWW_REGEX, '', text)
+    if remove_mention:
+        text = re.sub(MENTION_REGEX, '', text)
+    if remove_hashtag:
+        text = re.sub(HASHTAG_REGEX, '', text)
+    text = re.sub(SPECIAL_CHARS_REGEX, r'\1', text)
+    return re.sub(WHITESPACE_REGEX, ' ', text).strip()
+
+@pytest.fixture(scope='module')
+def corpus():
+    rng = random.Random(0)
+    return [''.join(rng.choices(FRAGMENTS, k=rng.randint(1, 12))) for _ in range(3000)]
+
+@pytest.mark.parametrize('options', OPTIONS)
+def test_transform_text_matches_baseline(corpus, options):
+    cleaner = CommentCleaner()
+    for text in corpus:
+        assert cleaner.transform_text(text, *options) == baseline_transform(text, *options), text
+
+@pytest.mark.parametrize('dtype', [object, 'string[python]', pytest.param('string[pyarrow]', id='arrow')])
+@pytest.mark.parametrize('options', OPTIONS)
+def test_transform_series_matches_baseline(corpus, options, dtype):
+    if dtype == 'string[pyarrow]':
+        pytest.importorskip('pyarrow')
+    series = pd.Series(corpus, dtype=dtype)
+    expected = [baseline_transform(text, *options) for text in corpus]
+    assert CommentCleaner().transform_series(series, *options).tolist() == expected
+
+@pytest.mark.parametrize('text, expected', [
+    ('www.ab.http://x hello there', 'www.ab. hello there'),
+    ('@http://x.coméàè hello world', 'hello world'),
+    ('#http://a.coمرحباé', ''),
+])
+def test_rules_apply_in_order(text, expected):
+    assert CommentCleaner().transform_text(text, True, True, True) == expected
+
+AUTHORS = ['Jane Doe', 'John Smith', 'Maria Garcia', 'Wei Zhang', "Liam O'Brien", 'Ana Sofia Costa']
+SHORT_COMMENTS = ['love it', 'not for me', 'so funny!', 'great video', 'same', 'where is this?']
+
+@pytest.fixture
+def posts():
+    return pd.DataFrame({
+        'id': range(6), 'author': AUTHORS, 'body': SHORT_COMMENTS,
+        'url': [f'https://example.com/p/{i}' for i in range(6)]
+    })
+
+def test_detects_short_comments_over_names(posts):
+    assert CommentCleaner().detect_comment_column(posts) == 'body'
+
+def test_names_alone_are_not_comments(posts):
+    assert CommentCleaner().detect_comment_column(posts.drop(columns='body')) is None
+
+EMOJI_FRAGMENTS = ['a', 'b ', ' ', 'é', '中', '1', '#', '*', '⃣', '‍', '︎', '️', '❤',
+                   '\U0001f3fb', '\U0001f9b0', '\U0001f1e6', '\U0001f1fa', '\U0001f468', '\U0001f3f4',
+                   '\U000e0067', '\U000e007f']
+
+def test_emoji_pattern_matches_emoji_package_on_every_emoji():
+    cleaner = CommentCleaner()
+    for sequence in emoji.EMOJI_DATA:
+        assert cleaner.analyze_emoji(sequence)[0] == emoji.replace_emoji(sequence, replace=''), ascii(sequence)
+
+def test_emoji_pattern_matches_emoji_package_on_mixed_text():
+    cleaner = CommentCleaner()
+    sequences = sorted(emoji.EMOJI_DATA)
+    rng = random.Random(0)
+    for _ in range(20000):
+        text = ''.join(rng.choice(sequences) if rng.random() < 0.4 else rng.choice(EMOJI_FRAGMENTS)
+                       for _ in range(rng.randint(1, 10)))
+        assert cleaner.analyze_emoji(text)[0] == emoji.replace_emoji(text, replace=''), ascii(text)
@@ -0,0 +1,53 @@
+import io
+
+import numpy as np
+
+from comment_cleaner.dedup import Deduplicator, normalize_for_dedup
+from comment_cleaner.pipeline import clean_source
+
+BASE = 'the delivery was quick and the packaging kept everything safe, would order again from this shop'
+
+def test_normalization_ignores_case_punctuation_and_spacing():
+    assert normalize_for_dedup(['Hello,  WORLD!!', 'ｈｅｌｌｏ world']).tolist() == ['hello world', 'hello world']
+
+def test_exact_duplicates_keep_the_first_occurrence():
+    marked = Deduplicator().mark(['Great video!', 'great   video', 'Something else', 'GREAT VIDEO.'])
+    assert marked.tolist() == [False, True, False, True]
+
+def test_state_is_shared_across_calls():
+    deduplicator = Deduplicator()
+    assert deduplicator.mark(['first comment', 'second comment']).tolist() == [False, False]
+    assert deduplicator.mark(['Second comment!', 'third comment']).tolist() == [True, False]
+
+def test_near_duplicates_are_found_by_minhash():
+    deduplicator = Deduplicator(near_threshold=0.8)
+    texts = [BASE, BASE.replace('quick', 'quik'), 'completely different remark about the colour of the product', BASE + ' :)']
+    assert deduplicator.mark(texts).tolist() == [False, True, False, True]
+    assert Deduplicator().mark(texts).tolist() == [False, False, False, True]
+
+def test_near_duplicates_are_found_across_calls():
+    deduplicator = Deduplicator(near_threshold=0.8)
+    deduplicator.mark([BASE])
+    assert deduplicator.mark([BASE.replace('again', 'agian')]).tolist() == [True]
+
+def test_minhash_similarity_tracks_jaccard():
+    deduplicator = Deduplicator(near_threshold=0.5, num_perm=256)
+    other = BASE.replace('packaging kept everything safe', 'box was a bit damaged')
+    signatures = deduplicator.signatures_for([BASE, other])
+    shingles = [{text[i:i + 5] for i in range(len(text) - 4)} for text in [BASE, other]]
+    jaccard = len(shingles[0] & shingles[1]) / len(shingles[0] | shingles[1])
+    assert abs(np.mean(signatures[0] == signatures[1]) - jaccard) < 0.1
+
+def test_streamed_csv_with_late_latin1_bytes_is_cleaned_once(tmp_path):
+    # The first chunks decode as UTF-8; a retry in latin-1 used to feed the
+    # shared deduplicator twice and drop every earlier row as a duplicate.
+    rows = ['comment'] + [f'unique comment text number {i} here' for i in range(20000)] + ['café latin-1 row here']
+    data = '\n'.join(rows).encode('latin-1')
+    result, error = clean_source(
+        io.BytesIO(data), 'csv', {'remove_duplicates': True, 'deduplicator': Deduplicator(), 'chunksize': 5000},
+        stream_to=str(tmp_path / 'out.csv')
+    )
+    assert error is None
+    assert result['encoding'] == 'latin-1'
+    assert result['stats']['final_count'] == 20001
+    assert result['removed']['duplicate'] == 0
@@ -0,0 +1,83 @@
+import io
+
+import pandas as pd
+import pytest
+
+from comment_cleaner.incremental import RowStore, options_fingerprint
+from comment_cleaner.pipeline import clean_source
+from comment_cleaner.timing import StageTimer
+
+OPTIONS = {'min_length': 10, 'remove_emoji': True, 'remove_url': True}
+
+def make_comments(count, start=0):
+    # Every text is unique, so rows are new whether known by id or by text.
+    texts = ['a perfectly ordinary comment number {}', 'ok {}', '!!! ?? {}', 'visit https://example.com/{} now please',
+             'ну это просто отличное видео {}', 'ความคิดเห็นที่ยาวพอสมควร {}', '😀😀 {}']
+    return pd.DataFrame({
+        'id': range(start, start + count),
+        'comment': [texts[i % len(texts)].format(i) for i in range(start, start + count)]
+    })
+
+def run(df, options, row_store=None, key_column=None):
+    timer = StageTimer()
+    result, error = clean_source(io.BytesIO(df.to_csv(index=False).encode()), 'csv', options,
+                                 row_store=row_store, key_column=key_column, timer=timer)
+    assert error is None
+    stages = {record['stage']: record for record in timer.records()}
+    return result, stages
+
+@pytest.fixture
+def store_path(tmp_path):
+    return str(tmp_path / 'rows.sqlite')
+
+def test_fingerprint_follows_only_options_that_change_results():
+    assert options_fingerprint(OPTIONS) == options_fingerprint(dict(OPTIONS, workers=4))
+    assert options_fingerprint(OPTIONS) != options_fingerprint(dict(OPTIONS, min_length=5))
+    assert options_fingerprint(OPTIONS) != options_fingerprint(OPTIONS, key_column='id')
+
+def test_store_is_emptied_when_fingerprint_changes(store_path):
+    row = ('k', b'digest', None, 'cleaned', 'latin')
+    with RowStore(store_path, 'first') as store:
+        store.put([row])
+    with RowStore(store_path, 'first') as store:
+        assert store.lookup(['k', 'other']) == [row[1:], None]
+    with RowStore(store_path, 'second') as store:
+        assert len(store) == 0
+
+@pytest.mark.parametrize('key_column', [None, 'id'])
+def test_unchanged_file_reuses_every_row(store_path, key_column):
+    df = make_comments(300)
+    first, _ = run(df, OPTIONS, store_path, key_column)
+    again, stages = run(df, OPTIONS, store_path, key_column)
+    assert stages['store_lookup']['rows_out'] == len(df)
+    assert stages['store_write']['rows_in'] == 0
+    pd.testing.assert_frame_equal(again['cleaned_df'], first['cleaned_df'])
+    assert again['removed'] == first['removed'] and again['stats'] == first['stats']
+
+@pytest.mark.parametrize('key_column', [None, 'id'])
+def test_added_rows_are_the_only_ones_cleaned(store_path, key_column):
+    run(make_comments(300), OPTIONS, store_path, key_column)
+    grown = pd.concat([make_comments(300), make_comments(50, start=300)], ignore_index=True)
+    result, stages = run(grown, OPTIONS, store_path, key_column)
+    assert stages['store_write']['rows_in'] == 50
+    reference, _ = run(grown, OPTIONS)
+    pd.testing.assert_frame_equal(result['cleaned_df'], reference['cleaned_df'])
+    assert result['removed'] == reference['removed'] and result['stats'] == reference['stats']
+
+def test_edited_comment_under_a_known_id_is_cleaned_again(store_path):
+    df = make_comments(100)
+    run(df, OPTIONS, store_path, 'id')
+    df.loc[0, 'comment'] = 'an edited comment that is long enough'
+    result, stages = run(df, OPTIONS, store_path, 'id')
+    assert stages['store_write']['rows_in'] == 1
+    assert result['cleaned_df']['comment'].iloc[0] == 'an edited comment that is long enough'
+
+def test_option_change_starts_over(store_path):
+    df = make_comments(300)
+    run(df, OPTIONS, store_path, 'id')
+    changed = dict(OPTIONS, min_length=3)
+    result, stages = run(df, changed, store_path, 'id')
+    assert stages['store_lookup']['rows_out'] == 0
+    assert stages['store_write']['rows_in'] == len(df)
+    reference, _ = run(df, changed)
+    pd.testing.assert_frame_equal(result['cleaned_df'], reference['cleaned_df'])
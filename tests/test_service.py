@@ -0,0 +1,89 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import pandas as pd
+import pytest
+
+from comment_cleaner.cleaner import METRIC_COLUMNS, CommentCleaner
+from comment_cleaner.service import make_server
+
+ROWS = [
+    {'id': 1, 'comment': 'Loved every minute of this, thanks! https://example.com'},
+    {'id': 2, 'comment': 'ok'},
+    {'id': 3, 'comment': 'ну это просто отличное видео'},
+    {'id': 4, 'comment': '😀😀😀'},
+    {'id': 5, 'comment': 'Loved every minute of this, thanks!'},
+]
+
+@pytest.fixture(scope='module')
+def base_url():
+    server = make_server(port=0, max_wait=0.01)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield 'http://%s:%d' % server.server_address[:2]
+    server.shutdown()
+    server.server_close()
+    server.batcher.close()
+
+def post(base_url, body, query='', content_type='application/json'):
+    request = urllib.request.Request(base_url + '/clean' + query, data=body, headers={'Content-Type': content_type})
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+def test_rows_are_cleaned_like_clean_dataset(base_url):
+    status, payload = post(base_url, json.dumps(ROWS).encode())
+    assert status == 200
+    cleaner = CommentCleaner()
+    expected, _ = cleaner.clean_dataset(pd.DataFrame(ROWS))
+    assert payload['rows'] == expected.to_dict('records')
+    assert payload['removed'] == cleaner.removed_rows
+    assert payload['stats']['final_count'] == len(expected)
+
+def test_plain_strings_and_ndjson_are_accepted(base_url):
+    comments = [row['comment'] for row in ROWS]
+    status, payload = post(base_url, json.dumps(comments).encode(), '?remove_url=false')
+    assert status == 200
+    assert payload['rows'][0]['comment'].endswith('https://example.com')
+    ndjson = '\n'.join(json.dumps(row) for row in ROWS).encode()
+    assert post(base_url, ndjson, content_type='application/x-ndjson')[1]['rows'] == \
+        post(base_url, json.dumps(ROWS).encode())[1]['rows']
+
+@pytest.mark.parametrize('body, content_type', [(b'[]', 'application/json'), (b'', 'application/x-ndjson')])
+def test_empty_body_returns_no_rows(base_url, body, content_type):
+    status, payload = post(base_url, body, content_type=content_type)
+    assert status == 200
+    assert payload['rows'] == []
+    assert payload['stats']['original_count'] == 0
+
+def test_metrics_are_added(base_url):
+    status, payload = post(base_url, json.dumps(ROWS).encode(), '?metrics=true')
+    assert status == 200
+    assert list(payload['rows'][0]) == ['id', 'comment'] + METRIC_COLUMNS
+    assert payload['rows'][0]['url_count'] == 1
+
+def test_metrics_on_a_numeric_column_with_nothing_kept(base_url):
+    status, payload = post(base_url, b'[{"comment": 1}]', '?metrics=true')
+    assert status == 200
+    assert payload['rows'] == []
+
+def test_rows_without_a_comment_column_are_unprocessable(base_url):
+    status, payload = post(base_url, b'[{"a": 1, "b": 2}]')
+    assert status == 422
+    assert 'comment column' in payload['error']
+
+@pytest.mark.parametrize('body, query', [
+    (b'{"comment": "not an array"}', ''),
+    (b'[1, {"comment": "mixed"}]', ''),
+    (b'[not json', ''),
+    (b'[]', '?bogus=1'),
+    (b'[]', '?remove_url=maybe'),
+])
+def test_malformed_requests_are_rejected(base_url, body, query):
+    status, payload = post(base_url, body, query)
+    assert status == 400
+    assert payload['error']